@@ -6,5 +6,14 @@ app = Flask(__name__,
            template_folder='../templates')
 
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', os.urandom(24))
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 50)) * 1024 * 1024
 
-from . import routes  # Import routes after app creation 
\ No newline at end of file
+from .sessions import SERVER_SESSIONS, ServerSessionInterface
+if SERVER_SESSIONS:
+    app.session_interface = ServerSessionInterface()  # keeps the session cookie to an ID
+
+from . import routes  # Import routes after app creation
+from . import batch
+from . import media
+from . import metrics
+from . import summaries
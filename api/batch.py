@@ -0,0 +1,149 @@
+from flask import render_template, request, jsonify, Response, url_for
+from core.jobs import BACKGROUND_JOBS, DONE, FAILED, QueueFull, get_queue
+from core.transcript_cache import normalize_video_id
+import json
+import os
+import zipfile
+from . import app
+from .routes import summarize_video
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 50))
+
+
+@app.route('/batch')
+def batch_page():
+    return render_template('batch.html', max_items=BATCH_MAX_ITEMS)
+
+@app.route('/batch', methods=['POST'])
+def process_batch():
+    # Accepts a form post or JSON body with: links (list or newline-separated
+    # text), playlist_url, prompt_option, custom_prompt. Every video becomes a
+    # job on the background queue, so no request waits for the whole batch;
+    # returns 202 with the batch id to poll.
+    if not BACKGROUND_JOBS:
+        # Serverless: jobs would be frozen after the response and one request
+        # cannot run a whole batch within the function time limit
+        return jsonify({"error": "Batch summarization is not available on this deployment"}), 503
+    data = request.get_json(silent=True) or request.form
+    prompt_option = data.get('prompt_option', 'default')
+    custom_prompt = data.get('custom_prompt', '')
+
+    try:
+        links = collect_links(data.get('links', ''), data.get('playlist_url', ''))
+    except Exception as e:
+        return jsonify({"error": f"Error reading playlist: {str(e)}"}), 400
+    if not links:
+        return jsonify({"error": "No YouTube links provided"}), 400
+    if len(links) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} videos can be summarized at once"}), 400
+
+    items = [{"youtube_link": link, "prompt_option": prompt_option, "custom_prompt": custom_prompt}
+             for link in links]
+    try:
+        batch_id = get_queue().submit_batch(summarize_video, items)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({
+        "batch_id": batch_id,
+        "total": len(links),
+        "status_url": url_for('batch_status', batch_id=batch_id),
+        "download_url": url_for('download_batch', batch_id=batch_id),
+    }), 202
+
+@app.route('/batch/<batch_id>')
+def batch_status(batch_id):
+    results = batch_results(batch_id)
+    if results is None:
+        return jsonify({"error": "Unknown batch"}), 404
+    finished = sum(1 for item in results if item["status"] in (DONE, FAILED))
+    return jsonify({"batch_id": batch_id, "total": len(results), "finished": finished,
+                    "items": results})
+
+@app.route('/batch/<batch_id>/download')
+def download_batch(batch_id):
+    # Finished summaries so far, as JSON Lines (default) or a ZIP of Markdown files
+    results = batch_results(batch_id)
+    if results is None:
+        return jsonify({"error": "Unknown batch"}), 404
+    results = [item for item in results if item["status"] in (DONE, FAILED)]
+    if request.args.get('format') == 'zip':
+        return Response(_zip_stream(results),
+                        mimetype='application/zip',
+                        headers={'Content-Disposition': 'attachment; filename=summaries.zip'})
+    return Response(_jsonl_stream(results), mimetype='application/x-ndjson')
+
+def collect_links(links, playlist_url=''):
+    if isinstance(links, str):
+        links = links.split()
+    links = [link.strip() for link in links if link.strip()]
+    if playlist_url:
+        from pytube import Playlist
+        links.extend(Playlist(playlist_url).video_urls)
+    # Keep order, drop repeats of the same video
+    seen = set()
+    unique = []
+    for link in links:
+        video_id = normalize_video_id(link)
+        if video_id not in seen:
+            seen.add(video_id)
+            unique.append(f"https://www.youtube.com/watch?v={video_id}")
+    return unique
+
+def batch_results(batch_id):
+    # One dict per video in submission order, or None for an unknown batch
+    jobs = get_queue().get_batch(batch_id)
+    if jobs is None:
+        return None
+    results = []
+    for index, job in enumerate(jobs):
+        if job is None:  # dropped from the job store after JOB_TTL
+            results.append({"index": index, "status": FAILED, "error": "Result expired"})
+            continue
+        item = {"index": index, "link": job["params"].get("youtube_link"),
+                "job_id": job["id"], "status": job["status"], "stage": job["stage"]}
+        if job["status"] == DONE:
+            item["summary"] = job["result"]["summary"]
+        elif job["status"] == FAILED:
+            item["error"] = job["error"]
+        results.append(item)
+    return results
+
+def _jsonl_stream(results):
+    for item in results:
+        yield json.dumps(item) + "\n"
+
+class _ZipChunks:
+    # Write-only file object for zipfile; the bytes written so far are handed
+    # out by take() so the archive is streamed and never held in full.
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _zip_stream(results):
+    out = _ZipChunks()
+    index_lines = []
+    with zipfile.ZipFile(out, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for item in results:
+            index_lines.append(json.dumps({k: v for k, v in item.items() if k != "summary"}))
+            if item["status"] == DONE:
+                video_id = normalize_video_id(item["link"])
+                archive.writestr(f"{item['index'] + 1:03d}_{video_id}.md", item["summary"])
+            yield out.take()
+        archive.writestr("index.jsonl", "\n".join(index_lines) + "\n")
+    yield out.take()
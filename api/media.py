@@ -0,0 +1,126 @@
+from flask import request, jsonify, send_file, Response, stream_with_context
+from core.images import get_session
+from core.media import (
+    MEDIA_FORMATS, CacheWriter, MediaError, acquire_slot, cached_path, download_name,
+    release_slot, resolve_format, valid_video_id
+)
+from core.thumbnails import get_thumbnail, snap_width
+import os
+from . import app
+
+_CHUNK_SIZE = 256 * 1024
+
+
+@app.route('/thumbnail/<video_id>')
+def thumbnail(video_id):
+    # Local thumbnail proxy: fetched from YouTube once, resized variants generated
+    # once, then served with a strong ETag so repeat visitors get 304s.
+    if not valid_video_id(video_id):
+        return jsonify({"error": "Invalid video ID"}), 400
+
+    fmt = request.args.get('fmt')
+    negotiated = fmt is None
+    if negotiated:
+        fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    thumbnail = get_thumbnail(video_id, snap_width(request.args.get('w', 0, type=int)), fmt)
+    if thumbnail is None:
+        return jsonify({"error": "Thumbnail not available"}), 404
+
+    path, mimetype, etag = thumbnail
+    # conditional=True answers If-None-Match with a 304
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True, max_age=86400)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+
+
+@app.route('/download_media/<video_id>/<media_type>')
+def download_media(video_id, media_type):
+    if not valid_video_id(video_id):
+        return jsonify({"error": "Invalid video ID"}), 400
+
+    if media_type == 'thumbnail':
+        thumbnail = get_thumbnail(video_id)
+        if thumbnail is None:
+            return jsonify({"error": "Thumbnail not available"}), 404
+        path, mimetype, etag = thumbnail
+        return send_file(path, mimetype=mimetype, as_attachment=True, etag=etag,
+                         download_name='thumbnail.jpg', max_age=86400)
+
+    if media_type not in MEDIA_FORMATS:
+        return jsonify({"error": f"Unsupported media type: {media_type}"}), 400
+    mimetype = MEDIA_FORMATS[media_type][1]
+
+    # Served from the local cache: send_file handles Range/If-Range for resumes
+    path = cached_path(video_id, media_type)
+    if path:
+        return send_file(path, mimetype=mimetype, as_attachment=True, conditional=True,
+                         download_name=f"{video_id}{os.path.splitext(path)[1]}")
+
+    if not acquire_slot():
+        return jsonify({"error": "Too many downloads in progress, please try again shortly"}), 503
+    try:
+        media = resolve_format(video_id, media_type)
+        headers = dict(media['headers'])
+        if request.headers.get('Range'):
+            headers['Range'] = request.headers['Range']
+        upstream = get_session().get(media['url'], headers=headers, stream=True, timeout=(5, 30))
+    except MediaError as e:
+        release_slot()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        release_slot()
+        return jsonify({"error": f"Error preparing download: {str(e)}"}), 502
+
+    if upstream.status_code not in (200, 206):
+        upstream.close()
+        release_slot()
+        if upstream.status_code == 416:
+            return Response(status=416, headers={'Content-Range': upstream.headers.get('Content-Range', '')})
+        return jsonify({"error": f"Upstream returned {upstream.status_code}"}), 502
+
+    response_headers = {
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': f'attachment; filename="{download_name(media["title"], media["ext"])}"',
+    }
+    for name in ('Content-Length', 'Content-Range', 'Last-Modified', 'ETag'):
+        if upstream.headers.get(name):
+            response_headers[name] = upstream.headers[name]
+
+    # Only complete downloads are worth keeping
+    writer = None
+    if upstream.status_code == 200:
+        writer = CacheWriter(video_id, media_type, media['ext'])
+    expected_size = upstream.headers.get('Content-Length')
+
+    state = {"completed": False, "closed": False}
+
+    def finish():
+        # Runs once: from the generator when it ends, or from call_on_close for
+        # HEAD requests and clients that leave before the body is read
+        if state["closed"]:
+            return
+        state["closed"] = True
+        upstream.close()
+        release_slot()
+        if writer:
+            if state["completed"]:
+                writer.commit(int(expected_size) if expected_size and expected_size.isdigit() else None)
+            else:
+                writer.abort()
+
+    def stream():
+        try:
+            for chunk in upstream.iter_content(_CHUNK_SIZE):
+                if writer:
+                    writer.write(chunk)
+                yield chunk
+            state["completed"] = True
+        finally:
+            finish()
+
+    response = Response(stream_with_context(stream()), status=upstream.status_code,
+                        mimetype=mimetype, headers=response_headers, direct_passthrough=True)
+    response.call_on_close(finish)
+    return response
@@ -0,0 +1,26 @@
+from flask import Response, request
+from core.metrics import get_metrics, request_timings, server_timing_header, start_request
+import time
+from . import app
+
+
+@app.before_request
+def start_timers():
+    request.started_at = time.perf_counter()
+    start_request()
+
+
+@app.after_request
+def add_server_timing(response):
+    # Stages timed with core.metrics.timed() during this request, plus the total
+    started_at = getattr(request, 'started_at', None)
+    if started_at is not None:
+        timings = request_timings() + [('total', time.perf_counter() - started_at)]
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus scrape endpoint; numbers are for the worker process that answers
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
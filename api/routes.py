@@ -1,14 +1,24 @@
-from flask import render_template, request, redirect, url_for, session, send_from_directory, jsonify
-from youtube_transcript_api import YouTubeTranscriptApi
-import google.generativeai as genai
+from flask import render_template, request, redirect, url_for, session, send_from_directory, jsonify, Response, stream_with_context
+from markupsafe import Markup, escape
+from core.summary_cache import get_cache as get_summary_cache
+from core.context_cache import get_cache as get_context_cache
+from core.metrics import get_metrics, timed
+from core.jobs import BACKGROUND_JOBS, DONE, FAILED, JobError, QueueFull, get_queue
+from core.documents import DocumentError, document_kind
+from core.rate_limit import RATE_LIMITED_MESSAGE
+from core.singleflight import get_flights
+from core.thumbnails import thumbnail_url
+from core.pipeline import (
+    SummaryError, extract_transcript, generate_summary, generate_summary_stream,
+    summarize_document, summary_model_for
+)
+import json
 import os
+import re
 import tempfile
 from pathlib import Path
 from . import app
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
 # Use temporary directory for file operations
 temp_dir = tempfile.gettempdir()
 
@@ -45,48 +55,156 @@ def process_video():
     if not youtube_link:
         return jsonify({"error": "No YouTube link provided"}), 400
 
-    video_id = youtube_link.split("v=")[-1].split("&")[0]
-    thumbnail_url = f"https://img.youtube.com/vi/{video_id}/0.jpg"
-    
     try:
-        transcript = extract_transcript(video_id)
-        if isinstance(transcript, str) and transcript.startswith("Error"):
-            return jsonify({"error": transcript}), 400
-
-        prompt_option = session.get('prompt_option', 'default')
-        custom_prompt = session.get('custom_prompt', '')
-        
-        summary = generate_summary(transcript, 
-                                 CONCISE_PROMPT if prompt_option == "concise" else 
-                                 custom_prompt if prompt_option == "custom" else 
-                                 PDF_PPT_PROMPT if prompt_option == "pdf_ppt" else 
-                                 PROMPT)
-        
-        if isinstance(summary, str) and summary.startswith("Error"):
-            return jsonify({"error": summary}), 400
-
-        return render_template('result.html',
-                            thumbnail_url=thumbnail_url,
-                            summary=summary,
-                            youtube_link=youtube_link)
-                            
+        result = summarize_video(lambda stage: None,
+                                 youtube_link,
+                                 session.get('prompt_option', 'default'),
+                                 session.get('custom_prompt', ''))
+        with timed('render'):
+            return render_template('result.html', **result)
+    except JobError as e:
+        return jsonify({"error": str(e)}), error_status(str(e))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def extract_transcript(video_id):
-    try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-        return ' '.join([entry['text'] for entry in transcript])
-    except Exception as e:
-        return f"Error extracting transcript: {str(e)}"
+@app.route('/jobs/<job_id>')
+def job_page(job_id):
+    job = get_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job['status'] == DONE:
+        return redirect(url_for('job_result', job_id=job_id))
+    return render_template('job.html', job_id=job_id)
 
-def generate_summary(transcript, prompt):
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt + transcript)
-        return response.text if hasattr(response, "text") else "Error: Unexpected response format"
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+@app.route('/jobs/<job_id>/status')
+def job_status(job_id):
+    job = get_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({
+        "id": job['id'],
+        "status": job['status'],
+        "stage": job['stage'],
+        "error": job['error'],
+        "result_url": url_for('job_result', job_id=job_id) if job['status'] == DONE else None,
+    })
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = get_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job['status'] == FAILED:
+        return jsonify({"error": job['error']}), error_status(job['error'])
+    if job['status'] != DONE:
+        return redirect(url_for('job_page', job_id=job_id))
+    with timed('render'):
+        return render_template('result.html', **job['result'])
+
+@app.route('/process_video_stream')
+def process_video_stream():
+    youtube_link = session.get('youtube_link')
+    if not youtube_link:
+        return jsonify({"error": "No YouTube link provided"}), 400
+
+    video_id = youtube_link.split("v=")[-1].split("&")[0]
+    return render_template('result.html',
+                           thumbnail_url=thumbnail_url(video_id),
+                           summary='',
+                           youtube_link=youtube_link,
+                           stream_url=url_for('summary_events'))
+
+@app.route('/summary_events')
+def summary_events():
+    # Server-Sent Events: one "chunk" event per piece of model output, then
+    # "done" with the formatted HTML, or "error" with the message.
+    youtube_link = session.get('youtube_link')
+    prompt_option = session.get('prompt_option', 'default')
+    custom_prompt = session.get('custom_prompt', '')
+
+    def events():
+        if not youtube_link:
+            yield _sse('error', {"error": "No YouTube link provided"})
+            return
+        video_id = youtube_link.split("v=")[-1].split("&")[0]
+        # Comment line so the browser gets its first byte before the transcript fetch
+        yield ": started\n\n"
+        with timed('transcript'):
+            transcript = extract_transcript(video_id)
+        if isinstance(transcript, str) and transcript.startswith("Error"):
+            get_metrics().count_error('transcript')
+            yield _sse('error', {"error": transcript})
+            return
+        parts = []
+        try:
+            for text in generate_summary_stream(transcript, select_prompt(prompt_option, custom_prompt),
+                                                summary_model_for(prompt_option)):
+                parts.append(text)
+                yield _sse('chunk', {"text": text})
+        except SummaryError as e:
+            yield _sse('error', {"error": str(e)})
+            return
+        except Exception as e:
+            yield _sse('error', {"error": f"Error generating summary: {str(e)}"})
+            return
+        yield _sse('done', {"html": str(format_content(''.join(parts)))})
+
+    return Response(stream_with_context(events()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/static/temp_images/<path:filename>')
+def serve_image(filename):
+    return send_from_directory(os.path.join(app.static_folder, 'temp_images'), filename, max_age=86400)
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify({"summary_cache": get_summary_cache().stats(),
+                    "coalescing": get_flights().stats(),
+                    "contexts": get_context_cache().stats()})
+
+def error_status(message):
+    # Gemini being over quota is temporary, not a problem with the request
+    return 503 if RATE_LIMITED_MESSAGE in (message or '') else 400
+
+def select_prompt(prompt_option, custom_prompt=''):
+    return (CONCISE_PROMPT if prompt_option == "concise" else
+            custom_prompt if prompt_option == "custom" else
+            PDF_PPT_PROMPT if prompt_option == "pdf_ppt" else
+            PROMPT)
+
+def summarize_video(set_stage, youtube_link, prompt_option='default', custom_prompt=''):
+    # Transcript -> summary pipeline shared by the blocking route and the job queue
+    video_id = youtube_link.split("v=")[-1].split("&")[0]
+
+    metrics = get_metrics()
+    set_stage('transcript')
+    with timed('transcript'):
+        transcript = extract_transcript(video_id)
+    if isinstance(transcript, str) and transcript.startswith("Error"):
+        metrics.count_error('transcript')
+        raise JobError(transcript)
+    metrics.observe_size('transcript', len(transcript))
+
+    with timed('prompt'):
+        prompt = select_prompt(prompt_option, custom_prompt)
+
+    set_stage('summary')
+    with timed('summary'):
+        summary = generate_summary(transcript, prompt, summary_model_for(prompt_option))
+    if isinstance(summary, str) and summary.startswith("Error"):
+        metrics.count_error('summary')
+        raise JobError(summary)
+    metrics.observe_size('summary', len(summary))
+
+    return {
+        "thumbnail_url": thumbnail_url(video_id),
+        "summary": summary,
+        "youtube_link": youtube_link,
+    }
 
 @app.route('/process_youtube', methods=['POST'])
 def process_youtube():
@@ -98,5 +216,108 @@ def process_youtube():
         session['youtube_link'] = youtube_link
         session['prompt_option'] = prompt_option
         session['custom_prompt'] = custom_prompt
-        return redirect(url_for('process_video'))
-    return redirect(url_for('home')) 
\ No newline at end of file
+        if request.form.get('stream'):
+            return redirect(url_for('process_video_stream'))
+        if not BACKGROUND_JOBS:
+            # Serverless: summarize inside this request
+            return redirect(url_for('process_video'))
+        try:
+            job_id = get_queue().submit(summarize_video,
+                                        youtube_link=youtube_link,
+                                        prompt_option=prompt_option,
+                                        custom_prompt=custom_prompt)
+        except QueueFull as e:
+            return jsonify({"error": str(e)}), 503
+        return redirect(url_for('job_page', job_id=job_id))
+    return redirect(url_for('home')) 
+
+@app.route('/process_document', methods=['POST'])
+def process_document():
+    document = request.files.get('document')
+    if not document or not document.filename:
+        return jsonify({"error": "No document uploaded"}), 400
+    try:
+        kind = document_kind(document.filename)
+    except DocumentError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Spool the upload to disk so pages can be read lazily by the extractor pool
+    upload = tempfile.NamedTemporaryFile(dir=temp_dir, suffix='.' + kind, delete=False)
+    try:
+        with upload:
+            document.save(upload)
+        summary = summarize_document(upload.name, kind, PDF_PPT_PROMPT)
+        if summary.startswith("Error"):
+            return jsonify({"error": summary}), error_status(summary)
+        return render_template('document_result.html', summary=summary)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        os.remove(upload.name)
+
+# Error handling
+@app.errorhandler(500)
+def internal_error(error):
+    return "500 Internal Server Error: The server encountered an unexpected condition.", 500
+
+@app.errorhandler(404)
+def not_found_error(error):
+    return "404 Not Found: The requested URL was not found on the server.", 404
+
+
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET_RE = re.compile(r"^\s*[*\-•]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+
+@app.template_filter('format_content')
+def format_content(text):
+    # Small Markdown subset (headings, bold, bullet/numbered lists, code fences)
+    # that covers what Gemini produces for our prompts.
+    html = []
+    list_tag = None
+    in_code = False
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            html.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in (text or '').splitlines():
+        if line.strip().startswith("```"):
+            close_list()
+            html.append("</code></pre>" if in_code else "<pre><code>")
+            in_code = not in_code
+            continue
+        if in_code:
+            html.append(str(escape(line)) + "\n")
+            continue
+
+        inline = _BOLD_RE.sub(r"<strong>\1</strong>", str(escape(line.strip())))
+        heading = _HEADING_RE.match(line.strip())
+        bullet = _BULLET_RE.match(line)
+        numbered = _NUMBERED_RE.match(line)
+        if heading:
+            close_list()
+            level = min(len(heading.group(1)) + 1, 6)
+            content = _BOLD_RE.sub(r"<strong>\1</strong>", str(escape(heading.group(2))))
+            html.append(f"<h{level}>{content}</h{level}>")
+        elif bullet or numbered:
+            tag = "ul" if bullet else "ol"
+            if list_tag != tag:
+                close_list()
+                html.append(f"<{tag}>")
+                list_tag = tag
+            item = (bullet or numbered).group(1)
+            html.append("<li>" + _BOLD_RE.sub(r"<strong>\1</strong>", str(escape(item))) + "</li>")
+        elif not line.strip():
+            close_list()
+        else:
+            close_list()
+            html.append(f"<p>{inline}</p>")
+
+    close_list()
+    if in_code:
+        html.append("</code></pre>")
+    return Markup("\n".join(html))
@@ -0,0 +1,73 @@
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from core.disk_cache import DEFAULT_DB_PATH, DiskCache
+import os
+import re
+import secrets
+import sqlite3
+
+# Session data lives server-side in SQLite (shared by every worker); the cookie
+# only carries a random session ID, so it stays a few dozen bytes no matter how
+# long the custom prompt is. Only used when SESSION_DB_PATH points at storage
+# every instance shares: on serverless hosts each instance has its own /tmp,
+# so the default stays Flask's signed cookie sessions.
+SERVER_SESSIONS = os.getenv("SERVER_SESSIONS", "1" if os.getenv("SESSION_DB_PATH") else "0") == "1"
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", DEFAULT_DB_PATH)
+SESSION_TTL = int(os.getenv("SESSION_TTL", 7 * 24 * 3600))  # seconds
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", 100000))
+
+_SID_RE = re.compile(r"^[A-Za-z0-9_-]{43}$")
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSessionInterface(SessionInterface):
+    def __init__(self, store=None):
+        self.store = store or DiskCache(SESSION_DB_PATH, "sessions", SESSION_TTL,
+                                        max_entries=SESSION_MAX_ENTRIES)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and _SID_RE.match(sid):
+            try:
+                data = self.store.get(sid)
+            except sqlite3.Error:
+                data = None
+            if data is not None:
+                return ServerSession(data, sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                try:
+                    self.store.delete(session.sid)
+                except sqlite3.Error:
+                    pass  # expires with SESSION_TTL instead
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if session.modified:
+            try:
+                self.store.put(session.sid, dict(session))
+            except sqlite3.Error:
+                return  # A broken session store should never fail the response
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                domain=domain, path=path,
+            )
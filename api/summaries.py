@@ -0,0 +1,77 @@
+from flask import request, jsonify, url_for
+from core.jobs import BACKGROUND_JOBS, DONE, FAILED, JobError, QueueFull, get_queue
+import os
+from . import app
+from .routes import error_status, format_content, summarize_video
+
+# How long POST /api/summaries waits for the summary before handing back a job
+# to poll instead. Cached and coalesced summaries come back well within it;
+# kept short so a sync gunicorn worker is not held for most of its timeout.
+API_WAIT_SECONDS = float(os.getenv("API_WAIT_SECONDS", 3))
+
+
+@app.route('/api/summaries', methods=['POST'])
+def create_summary():
+    # JSON body: youtube_link, prompt_option, custom_prompt, wait (seconds, optional).
+    # 200 with the summary when it is ready in time, otherwise 202 with a job to poll.
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    for field in ('youtube_link', 'prompt_option', 'custom_prompt'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return jsonify({"error": f"{field} must be a string"}), 400
+    youtube_link = (data.get('youtube_link') or '').strip()
+    if not youtube_link:
+        return jsonify({"error": "No YouTube link provided"}), 400
+    prompt_option = data.get('prompt_option') or 'default'
+    custom_prompt = data.get('custom_prompt') or ''
+    try:
+        wait = min(max(float(data.get('wait', API_WAIT_SECONDS)), 0), API_WAIT_SECONDS)
+    except (TypeError, ValueError):
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    if not BACKGROUND_JOBS:
+        # Serverless: there is no job to come back to, so answer in this request
+        try:
+            result = summarize_video(lambda stage: None, youtube_link, prompt_option, custom_prompt)
+        except JobError as e:
+            return jsonify({"status": FAILED, "error": str(e)}), error_status(str(e))
+        return jsonify(_summary_body(None, result))
+
+    try:
+        job_id = get_queue().submit(summarize_video,
+                                    youtube_link=youtube_link,
+                                    prompt_option=prompt_option,
+                                    custom_prompt=custom_prompt)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    job = get_queue().wait(job_id, wait)
+    if job['status'] == FAILED:
+        return jsonify({"id": job_id, "status": job['status'], "error": job['error']}), \
+            error_status(job['error'])
+    if job['status'] == DONE:
+        return jsonify(_summary_body(job_id, job['result']))
+
+    status_url = url_for('job_status', job_id=job_id)
+    response = jsonify({
+        "id": job_id,
+        "status": job['status'],
+        "stage": job['stage'],
+        "status_url": status_url,
+        "result_url": url_for('job_result', job_id=job_id),
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
+def _summary_body(job_id, result):
+    return {
+        "id": job_id,
+        "status": DONE,
+        "youtube_link": result['youtube_link'],
+        "thumbnail_url": result['thumbnail_url'],
+        "summary": result['summary'],
+        "summary_html": str(format_content(result['summary'])),
+    }
@@ -0,0 +1,270 @@
+"""End-to-end load benchmark for the Flask app, runnable offline.
+
+Drives the real routes (POST /process_youtube, then polling the job it
+starts, or GET /process_video directly) from many threads. YouTube and
+Gemini are replaced by in-process fakes with tunable latency and payload
+size. Each transcript profile runs in a fresh interpreter, so its peak memory
+and caches are its own.
+
+    python benchmarks/load.py --requests 200 --concurrency 16
+    python benchmarks/load.py --profiles long --model-latency 1.5 --mode direct
+
+Results are appended to benchmarks/results/load_history.jsonl. Each run is
+compared with the last run that used the same settings, and the script
+exits non-zero when p95 latency or throughput got worse by more than
+--max-regression.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "load_history.jsonl")
+
+# Transcript length in minutes. A caption segment covers ~4 s of ~10 words.
+PROFILES = {"short": 10, "medium": 60, "long": 180}
+SEGMENT_SECONDS = 4
+WORDS_PER_SEGMENT = 10
+
+_VOCABULARY = (
+    "the signal processor memory register clock voltage current circuit instruction address bus "
+    "interrupt cache pipeline stage transistor gate logic flip flop counter timer data control "
+    "example lecture today we will see how this works so let us look at the next diagram"
+).split()
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def fake_segments(video_id, minutes):
+    rng = random.Random(video_id)
+    return [
+        {
+            "text": " ".join(rng.choice(_VOCABULARY) for _ in range(WORDS_PER_SEGMENT)),
+            "start": float(index * SEGMENT_SECONDS),
+            "duration": float(SEGMENT_SECONDS),
+        }
+        for index in range(minutes * 60 // SEGMENT_SECONDS)
+    ]
+
+
+def install_fakes(minutes, transcript_latency, model_latency, summary_words):
+    # Stand-ins for youtube_transcript_api and google.generativeai, registered
+    # before the app imports them lazily.
+    class YouTubeTranscriptApi:
+        @staticmethod
+        def get_transcript(video_id, languages=("en",)):
+            time.sleep(transcript_latency)
+            return fake_segments(video_id, minutes)
+
+    transcript_module = types.ModuleType("youtube_transcript_api")
+    transcript_module.YouTubeTranscriptApi = YouTubeTranscriptApi
+    sys.modules["youtube_transcript_api"] = transcript_module
+
+    from core.fake_model import FakeModel
+
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = lambda model_name: FakeModel(
+        model_name, latency=model_latency, chunk_delay=0, words=summary_words)
+    google = sys.modules.get("google") or types.ModuleType("google")
+    google.generativeai = genai
+    sys.modules["google"] = google
+    sys.modules["google.generativeai"] = genai
+
+
+def video_id_for(index, distinct):
+    return f"bench{index % distinct:06d}"
+
+
+def request_job(client, link):
+    # What the browser does: submit the form, then poll the job page's status endpoint
+    response = client.post("/process_youtube", data={"youtube_link": link, "prompt_option": "default"})
+    if response.status_code != 302 or "/jobs/" not in response.location:
+        return response.status_code
+    job_id = response.location.rstrip("/").split("/jobs/")[-1]
+    while True:
+        status = client.get(f"/jobs/{job_id}/status").get_json()
+        if status["status"] == "done":
+            return client.get(status["result_url"]).status_code
+        if status["status"] == "error":
+            return 500
+        time.sleep(0.01)
+
+
+def request_direct(client, link):
+    with client.session_transaction() as session:
+        session["youtube_link"] = link
+        session["prompt_option"] = "default"
+        session["custom_prompt"] = ""
+    return client.get("/process_video").status_code
+
+
+def run_profile(args):
+    install_fakes(PROFILES[args.profile], args.transcript_latency, args.model_latency, args.summary_words)
+    from api import app
+
+    distinct = args.videos or args.requests
+    clients = threading.local()
+    handler = request_job if args.mode == "job" else request_direct
+
+    def one(index):
+        client = getattr(clients, "client", None)
+        if client is None:
+            client = clients.client = app.test_client()
+        link = f"https://www.youtube.com/watch?v={video_id_for(index, distinct)}"
+        start = time.perf_counter()
+        status = handler(client, link)
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for seconds, status in results if status == 200]
+    try:
+        import resource
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    except ImportError:
+        peak_rss_mb = None
+    return {
+        "profile": args.profile,
+        "requests": args.requests,
+        "errors": sum(1 for _, status in results if status != 200),
+        "rps": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_child(args, profile, workdir):
+    # Fresh interpreter per profile; caches, job store and limiter state in a scratch dir
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        SUMMARIZER_FAKE_MODEL="0",
+        GEMINI_RPM=str(args.rpm),
+        JOB_WORKERS=str(args.concurrency),
+        JOB_MAX_PENDING=str(max(args.requests, 64)),
+        SUMMARY_CACHE_PATH=os.path.join(workdir, f"{profile}.sqlite3"),
+        TRANSCRIPT_CACHE_PATH=os.path.join(workdir, f"{profile}.sqlite3"),
+        JOB_DB_PATH=os.path.join(workdir, f"{profile}.sqlite3"),
+        SINGLEFLIGHT_DB_PATH=os.path.join(workdir, f"{profile}.sqlite3"),
+        RATE_LIMIT_DB_PATH=os.path.join(workdir, f"{profile}_ratelimit.sqlite3"),
+        CONTEXT_CACHE_PATH=os.path.join(workdir, f"{profile}.sqlite3"),
+        SESSION_DB_PATH=os.path.join(workdir, f"{profile}.sqlite3"),
+    )
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--profile", profile]
+    for name in ("requests", "concurrency", "videos", "mode", "transcript_latency",
+                 "model_latency", "summary_words"):
+        command += ["--" + name.replace("_", "-"), str(getattr(args, name))]
+    output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def settings_of(args):
+    return {name: getattr(args, name) for name in (
+        "requests", "concurrency", "videos", "mode", "transcript_latency",
+        "model_latency", "summary_words", "rpm")}
+
+
+def previous_run(settings):
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH) as f:
+        for line in f:
+            run = json.loads(line)
+            if run["settings"] == settings:
+                previous = run
+    return previous
+
+
+def compare(report, previous, max_regression):
+    failures = []
+    if previous is None:
+        return failures
+    before = {result["profile"]: result for result in previous["results"]}
+    for result in report["results"]:
+        old = before.get(result["profile"])
+        if not old:
+            continue
+        for metric, worse in (("p95_ms", 1), ("rps", -1)):
+            if not old[metric] or result[metric] is None:
+                continue
+            change = (result[metric] - old[metric]) / old[metric]
+            print(f"{result['profile']:>6} {metric:>6}: {old[metric]:.1f} -> {result[metric]:.1f}"
+                  f" ({change:+.0%})")
+            if max_regression is not None and change * worse > max_regression:
+                failures.append(f"{result['profile']} {metric} regressed by {abs(change):.0%}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", default="short,medium,long",
+                        help="comma-separated subset of: " + ", ".join(PROFILES))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--videos", type=int, default=0,
+                        help="distinct videos to cycle through (0 = every request is a new video)")
+    parser.add_argument("--mode", choices=("job", "direct"), default="job",
+                        help="job: /process_youtube then poll the job; direct: /process_video")
+    parser.add_argument("--transcript-latency", type=float, default=0.2, help="seconds per transcript fetch")
+    parser.add_argument("--model-latency", type=float, default=0.5, help="seconds per model call")
+    parser.add_argument("--summary-words", type=int, default=300, help="words per fake model response")
+    parser.add_argument("--rpm", type=float, default=0, help="GEMINI_RPM for the run (0 = no rate limit)")
+    parser.add_argument("--max-regression", type=float,
+                        help="fail when p95 or RPS is this fraction worse than the last comparable run")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_profile(args)))
+        return
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profile(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_child(args, profile, workdir) for profile in profiles]
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": settings_of(args),
+              "results": results}
+    print(json.dumps(report, indent=2))
+
+    failures = compare(report, previous_run(report["settings"]), args.max_regression)
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a") as f:
+            f.write(json.dumps(report) + "\n")
+    for result in results:
+        if result["errors"]:
+            failures.append(f"{result['profile']}: {result['errors']} failed requests")
+    for failure in failures:
+        print("FAIL:", failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
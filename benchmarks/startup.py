@@ -0,0 +1,89 @@
+"""Cold-start benchmark for the serverless entry point (api/index.py).
+
+Each run starts a fresh interpreter, imports api.index the way Vercel does and
+sends one request to "/", so the numbers include everything a cold start pays.
+
+    python benchmarks/startup.py --runs 10 --max-import-ms 400 --max-first-response-ms 600
+
+Exits non-zero when a threshold is exceeded or when a heavy SDK got imported
+at startup, so it can guard against cold-start regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the routes that need them
+HEAVY_MODULES = [
+    "google.generativeai",
+    "youtube_transcript_api",
+    "pytube",
+    "PyPDF2",
+    "pptx",
+    "yt_dlp",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import api.index
+imported = time.perf_counter()
+response = api.index.app.test_client().get('/')
+responded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (responded - start) * 1000,
+    "status": response.status_code,
+    "heavy_modules": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once():
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-response-ms", type=float)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = [r["import_ms"] for r in runs]
+    response_ms = [r["first_response_ms"] for r in runs]
+    heavy = sorted({m for r in runs for m in r["heavy_modules"]})
+    report = {
+        "runs": args.runs,
+        "import_ms": {"median": statistics.median(import_ms), "max": max(import_ms)},
+        "first_response_ms": {"median": statistics.median(response_ms), "max": max(response_ms)},
+        "status_codes": sorted({r["status"] for r in runs}),
+        "heavy_modules_at_startup": heavy,
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if args.max_import_ms and report["import_ms"]["median"] > args.max_import_ms:
+        failures.append(f"median import {report['import_ms']['median']:.0f} ms > {args.max_import_ms:.0f} ms")
+    if args.max_first_response_ms and report["first_response_ms"]["median"] > args.max_first_response_ms:
+        failures.append(f"median first response {report['first_response_ms']['median']:.0f} ms"
+                        f" > {args.max_first_response_ms:.0f} ms")
+    for failure in failures:
+        print("FAIL:", failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Shared building blocks used by the Flask app (api/) and the Streamlit front-ends.
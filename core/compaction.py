@@ -0,0 +1,71 @@
+import os
+import re
+
+from core.mapreduce import estimate_tokens
+
+# Cleans auto-generated captions before they are sent to the model: caption
+# annotations, phrases repeated by overlapping caption lines, filler words
+# and stray whitespace all cost tokens without adding content.
+COMPACTION_ENABLED = os.getenv("TRANSCRIPT_COMPACTION", "1") == "1"
+DROP_FILLERS = os.getenv("TRANSCRIPT_DROP_FILLERS", "1") == "1"
+MAX_REPEAT_NGRAM = int(os.getenv("TRANSCRIPT_MAX_REPEAT_NGRAM", 12))  # longest repeated phrase collapsed, in words
+
+# Known caption annotations only ([Music], (laughter), ...), ♪ ... ♪ and ">>"
+# speaker markers; other bracketed text such as "A[i]" is content
+_ANNOTATION_NAMES = r"music|applause|laughter|laughs|inaudible|silence|noise|coughs?|crosstalk|foreign"
+_ANNOTATION_RE = re.compile(
+    rf"\[\s*(?:{_ANNOTATION_NAMES})\s*\]"
+    rf"|\(\s*(?:{_ANNOTATION_NAMES})\s*\)"
+    r"|[♪♫]+"
+    r"|>>+",
+    re.IGNORECASE,
+)
+# Hesitations only: "mm", "er" and "ah" are left alone, as in a lecture they
+# are as likely millimetres or ampere-hours as fillers
+_FILLERS = {"um", "umm", "uh", "uhh", "uhm", "erm", "hmm", "mhm"}
+# Single words are only collapsed when they are stutter-prone; "2 2 inputs"
+# or "0 0 1 1" mean something
+_STUTTER_WORDS = _FILLERS | {"i", "the", "a", "an", "and", "so", "like", "you", "we", "it"}
+_KEY_STRIP = ".,!?;:\"'"
+
+
+def _collapse_repeats(words, max_ngram):
+    # Drops a phrase (2..max_ngram words, or one stutter-prone word) when it is
+    # immediately repeated, e.g. "the register stores the register stores the
+    # value" -> "the register stores the value". Comparison ignores case and
+    # punctuation; phrases containing a number are never collapsed.
+    keys = [word.lower().strip(_KEY_STRIP) for word in words]
+    numeric = [any(ch.isdigit() for ch in key) for key in keys]
+    out = []
+    i = 0
+    total = len(words)
+    while i < total:
+        for n in range(min(max_ngram, (total - i) // 2), 0, -1):
+            if (keys[i] == keys[i + n] and keys[i:i + n] == keys[i + n:i + 2 * n]
+                    and (n > 1 or keys[i] in _STUTTER_WORDS) and not any(numeric[i:i + n])):
+                i += n  # skip the first copy; the second is checked again from here
+                break
+        else:
+            out.append(words[i])
+            i += 1
+    return out
+
+
+def compact_transcript(text, drop_fillers=DROP_FILLERS, max_ngram=MAX_REPEAT_NGRAM):
+    text = _ANNOTATION_RE.sub(" ", text)
+    words = text.split()  # also normalizes whitespace
+    if drop_fillers:
+        words = [word for word in words if word.lower().strip(_KEY_STRIP) not in _FILLERS]
+    return " ".join(_collapse_repeats(words, max_ngram))
+
+
+def compaction_savings(original, compacted):
+    chars = len(original) - len(compacted)
+    return {
+        "chars_before": len(original),
+        "chars_after": len(compacted),
+        "chars_saved": chars,
+        "tokens_saved": estimate_tokens(original) - estimate_tokens(compacted),
+        "ratio": chars / len(original) if original else 0.0,
+    }
+
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+from core.disk_cache import DEFAULT_DB_PATH, DiskCache
+from core.fake_model import FAKE_MODEL_ENABLED
+from core.mapreduce import estimate_tokens
+from core.singleflight import get_flights
+
+# Per-video context reuse. The first summary of a long transcript leaves a
+# context handle behind. Later prompts for the same transcript then only send
+# the new instruction. There are two kinds of handle:
+#   "gemini": model-side cached content holding the whole transcript. Gemini
+#             only caches prompts above a minimum size, hence CONTEXT_MIN_TOKENS.
+#   "notes":  local stand-in. It keeps the prompt-independent map-stage notes,
+#             so a later prompt only runs the reduce step. Works with any model,
+#             including the fake one.
+# Handles are recorded in SQLite so every worker can reuse them. They expire
+# after CONTEXT_TTL and are evicted least recently used past the size limits.
+CONTEXT_CACHE_PATH = os.getenv("CONTEXT_CACHE_PATH", DEFAULT_DB_PATH)
+CONTEXT_BACKEND = os.getenv("CONTEXT_BACKEND", "auto")  # auto | gemini | notes | off
+CONTEXT_TTL = int(os.getenv("CONTEXT_TTL", 3600))  # seconds
+CONTEXT_MAX_ENTRIES = int(os.getenv("CONTEXT_MAX_ENTRIES", 256))
+CONTEXT_MAX_BYTES = int(os.getenv("CONTEXT_MAX_BYTES", 32 * 1024 * 1024))
+CONTEXT_MIN_TOKENS = int(os.getenv("CONTEXT_MIN_TOKENS", 32768))
+
+# Server-side copies outlive the local record a little, so a handle we still
+# hold never points at content Gemini has already dropped
+_REMOTE_TTL_MARGIN = 300
+
+_unsupported_models = set()
+_remote_models = {}
+_remote_lock = threading.Lock()
+
+
+def _context_key(transcript, model_name, kind):
+    digest = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+    return f"{digest}|{model_name}|{kind}"
+
+
+class ContextCache(DiskCache):
+    def __init__(self, path=CONTEXT_CACHE_PATH, ttl=CONTEXT_TTL,
+                 max_entries=CONTEXT_MAX_ENTRIES, max_bytes=CONTEXT_MAX_BYTES):
+        super().__init__(path, "contexts", ttl, max_bytes=max_bytes, max_entries=max_entries)
+        self._stats_lock = threading.Lock()
+        self.reused = 0
+        self.created = 0
+
+    def context_for(self, transcript, model_name, kind, build):
+        # The stored handle for this transcript, or build() -> dict for a new one.
+        # Concurrent requests for the same transcript build it once.
+        key = _context_key(transcript, model_name, kind)
+        context = self._get(key)
+        if context is not None:
+            with self._stats_lock:
+                self.reused += 1
+            return context
+
+        def create():
+            context = build()
+            with self._stats_lock:
+                self.created += 1
+            try:
+                self.put(key, context)
+            except sqlite3.Error:
+                pass  # still usable for this request
+            return context
+
+        return get_flights().do("context:" + key, create, lookup=lambda: self.get(key))
+
+    def _get(self, key):
+        try:
+            return self.get(key)
+        except sqlite3.Error:
+            return None
+
+    def forget(self, transcript, model_name, kind):
+        try:
+            self.delete(_context_key(transcript, model_name, kind))
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        # Counters are per worker process
+        with self._stats_lock:
+            return {"reused": self.reused, "created": self.created}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContextCache()
+        return _cache
+
+
+def context_enabled():
+    return CONTEXT_BACKEND != "off"
+
+
+def remote_context_supported(transcript, model_name):
+    return (CONTEXT_BACKEND in ("auto", "gemini")
+            and not FAKE_MODEL_ENABLED
+            and model_name not in _unsupported_models
+            and estimate_tokens(transcript) >= CONTEXT_MIN_TOKENS)
+
+
+def mark_unsupported(model_name):
+    # Model (or SDK version) without context caching: stop trying in this process
+    _unsupported_models.add(model_name)
+
+
+def create_remote_context(transcript, model_name):
+    # Uploads the transcript as Gemini cached content. The SDK must be configured.
+    import datetime
+    from google.generativeai import caching
+
+    cached = caching.CachedContent.create(
+        model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+        display_name="transcript-" + hashlib.sha256(transcript.encode("utf-8")).hexdigest()[:16],
+        contents=[transcript],
+        ttl=datetime.timedelta(seconds=CONTEXT_TTL + _REMOTE_TTL_MARGIN),
+    )
+    return {"kind": "gemini", "name": cached.name}
+
+
+def remote_model(name):
+    # GenerativeModel bound to cached content, built once per process
+    with _remote_lock:
+        model = _remote_models.get(name)
+        if model is None:
+            import google.generativeai as genai
+            from google.generativeai import caching
+
+            model = genai.GenerativeModel.from_cached_content(
+                cached_content=caching.CachedContent.get(name))
+            if len(_remote_models) >= CONTEXT_MAX_ENTRIES:
+                _remote_models.pop(next(iter(_remote_models)))
+            _remote_models[name] = model
+        return model
+
+
+def forget_remote_model(name):
+    with _remote_lock:
+        _remote_models.pop(name, None)
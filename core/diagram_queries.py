@@ -0,0 +1,115 @@
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from core.extractive import content_words, split_sentences
+
+# Image-search queries for the diagrams a summary talks about, best first:
+#   1. "Draw a ____ Type of Diagram" markers, which PROMPT asks the model to write
+#   2. section headings that name a topic (not "Definition", "Merits", ...)
+#   3. the summary's top TF-IDF keywords, as a last resort
+DIAGRAM_MAX_QUERIES = int(os.getenv("DIAGRAM_MAX_QUERIES", 3))
+DIAGRAM_SEARCH_WORKERS = int(os.getenv("DIAGRAM_SEARCH_WORKERS", 3))
+
+# "Draw a Block Diagram of 8086 Type of Diagram", else "Draw a block diagram of the 8086"
+_MARKER_RE = re.compile(r"draw\s+(?:an?\s+|the\s+)?(.{2,80}?)\s+type\s+of\s+diagram", re.IGNORECASE)
+_LOOSE_MARKER_RE = re.compile(r"draw\s+(?:an?\s+|the\s+)?([^.\n]{0,80}?\bdiagram\b[^.\n]{0,60})", re.IGNORECASE)
+_HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+(.+?)\s*#*|\*\*([^*\n]{2,80}?)\s*:?\*\*\s*:?.*)$", re.MULTILINE)
+_NUMBERING_RE = re.compile(r"^\d+[.)]\s*")
+_MARKER_WORDS = {"diagram", "diagrams", "draw", "type"}
+_GENERIC_HEADINGS = {
+    "definition", "definitions", "classification", "explanation", "merits", "demerits",
+    "merits & demerits", "merits and demerits", "advantages", "disadvantages", "applications",
+    "conclusion", "summary", "introduction", "diagram", "diagrams", "key points", "notes",
+    "detailed notes", "overview", "example", "examples",
+}
+
+
+def _clean(text):
+    text = re.sub(r"[*_`#:\"]+", " ", text)
+    return " ".join(_NUMBERING_RE.sub("", text.strip()).split())
+
+
+def _as_query(subject):
+    subject = _clean(subject)
+    if "__" in subject:  # the prompt's own "Draw a ____" placeholder
+        return None
+    if not set(subject.lower().split()) - _MARKER_WORDS - {"a", "an", "the", "of"}:
+        return None  # "Draw a diagram" names nothing to search for
+    return subject if "diagram" in subject.lower() else f"{subject} diagram"
+
+
+def marker_queries(summary):
+    queries = []
+    for line in summary.splitlines():
+        matches = _MARKER_RE.findall(line) or _LOOSE_MARKER_RE.findall(line)
+        queries += [query for query in map(_as_query, matches) if query]
+    return queries
+
+
+def heading_queries(summary):
+    queries = []
+    for match in _HEADING_RE.finditer(summary):
+        heading = _clean(match.group(1) or match.group(2))
+        if heading.lower() not in _GENERIC_HEADINGS and len(heading.split()) <= 8:
+            query = _as_query(heading)
+            if query:
+                queries.append(query)
+    return queries
+
+
+def keyword_query(summary, count=3):
+    # Words frequent in the summary but not spread evenly across its sentences
+    sentences = split_sentences(summary)
+    if not sentences:
+        return None
+    document_frequency = Counter(word for sentence in sentences for word in set(content_words(sentence)))
+    term_frequency = Counter(word for word in content_words(summary)
+                             if len(word) > 2 and word not in _MARKER_WORDS)
+    if not term_frequency:
+        return None
+    scores = {word: tf * (math.log(len(sentences) / document_frequency[word]) + 1)
+              for word, tf in term_frequency.items()}
+    keywords = sorted(scores, key=lambda word: -scores[word])[:count]
+    return " ".join(keywords) + " diagram"
+
+
+def extract_diagram_queries(summary, max_queries=DIAGRAM_MAX_QUERIES):
+    candidates = marker_queries(summary) + heading_queries(summary)
+    if len(candidates) < max_queries:
+        candidates.append(keyword_query(summary))
+    queries = []
+    seen = set()
+    for query in candidates:
+        if query and query.lower() not in seen:
+            seen.add(query.lower())
+            queries.append(query)
+    return queries[:max_queries]
+
+
+def search_concurrently(queries, search, max_workers=DIAGRAM_SEARCH_WORKERS):
+    # [(query, search(query))] in query order; a failed search gives None
+    def run(query):
+        try:
+            return search(query)
+        except Exception:
+            return None
+
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+        return list(zip(queries, pool.map(run, queries)))
+
+
+def merge_results(results):
+    # Round-robin over the per-query image lists, so the first screen shows the
+    # best image of every query. Failed searches (None or "Error ..." strings) are skipped.
+    lists = [paths for _, paths in results if isinstance(paths, list)]
+    merged = []
+    for rank in range(max(map(len, lists), default=0)):
+        for paths in lists:
+            if rank < len(paths) and paths[rank] not in merged:
+                merged.append(paths[rank])
+    return merged
@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "summarizer_cache.sqlite3")
+
+# Only bump last_access on reads if it is older than this, so hot keys do
+# not turn every cache hit into a write.
+_TOUCH_INTERVAL = 60
+
+
+class DiskCache:
+    # Compressed JSON values in a SQLite table with TTL and LRU eviction.
+    # WAL mode + busy timeout make it safe to share between worker processes.
+
+    def __init__(self, path, table, ttl, max_bytes=None, max_entries=None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connect(self):
+        # sqlite3 connections must not cross threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            " key TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_last_access"
+            f" ON {self.table} (last_access)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            f"SELECT data, created, last_access FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        data, created, last_access = row
+        now = time.time()
+        if self.ttl and now - created > self.ttl:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        if now - last_access > _TOUCH_INTERVAL:
+            conn.execute(
+                f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(zlib.decompress(data))
+
+    def put(self, key, value):
+        data = zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 6)
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table}"
+                " (key, data, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl,))
+        count, total = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        if not self._over_limit(count, total):
+            return
+        # Drop least recently used entries until we are back under the limits
+        for key, size in conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY last_access ASC"
+        ).fetchall():
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            if not self._over_limit(count, total):
+                break
+
+    def _over_limit(self, count, total):
+        if self.max_entries is not None and count > self.max_entries:
+            return True
+        return self.max_bytes is not None and total > self.max_bytes
+
+    def clear(self):
+        self._connect().execute(f"DELETE FROM {self.table}")
@@ -0,0 +1,108 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Page/slide text extraction for PDF and PPTX uploads. Pages are extracted in
+# small ranges on a process pool; each worker opens the file itself, so only
+# the ranges currently in flight are ever held in memory.
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", min(4, os.cpu_count() or 1)))
+PAGES_PER_TASK = int(os.getenv("DOCUMENT_PAGES_PER_TASK", 8))
+
+SUPPORTED_EXTENSIONS = {".pdf": "pdf", ".pptx": "pptx"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class DocumentError(Exception):
+    pass
+
+
+def document_kind(filename):
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".ppt":
+        raise DocumentError("Old .ppt files are not supported, please save the file as .pptx")
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise DocumentError("Please upload a PDF or PPTX file")
+    return SUPPORTED_EXTENSIONS[extension]
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_units(path, kind):
+    if kind == "pdf":
+        from PyPDF2 import PdfReader
+        return len(PdfReader(path).pages)
+    from pptx import Presentation
+    return len(Presentation(path).slides)
+
+
+def extract_range(path, kind, start, end):
+    # Runs in a pool process. Returns the text of pages/slides [start, end).
+    if kind == "pdf":
+        from PyPDF2 import PdfReader
+        reader = PdfReader(path)
+        return [(reader.pages[i].extract_text() or "").strip() for i in range(start, end)]
+
+    from pptx import Presentation
+    slides = Presentation(path).slides
+    texts = []
+    for index in range(start, end):
+        parts = []
+        for shape in slides[index].shapes:
+            if shape.has_text_frame:
+                parts.extend(p.text for p in shape.text_frame.paragraphs if p.text.strip())
+        texts.append("\n".join(parts))
+    return texts
+
+
+def _get_pool():
+    # spawn, not fork: the web worker has threads running (job queue, SSE)
+    global _pool
+    with _pool_lock:
+        if _pool is None and DOCUMENT_WORKERS > 1:
+            try:
+                _pool = ProcessPoolExecutor(max_workers=DOCUMENT_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, NotImplementedError):
+                # Some serverless sandboxes have no working multiprocessing
+                return None
+        return _pool
+
+
+def iter_pages(path, kind, pages_per_task=PAGES_PER_TASK):
+    # Yields (label, text) for each page/slide in order, as soon as it and all
+    # pages before it have been extracted.
+    total = count_units(path, kind)
+    label = "Page" if kind == "pdf" else "Slide"
+    ranges = [(start, min(start + pages_per_task, total))
+              for start in range(0, total, pages_per_task)]
+    pool = _get_pool()
+
+    if pool is None:
+        for start, end in ranges:
+            for offset, text in enumerate(extract_range(path, kind, start, end)):
+                yield f"{label} {start + offset + 1}", text
+        return
+
+    # Keep a bounded window of ranges in flight
+    window = max(1, DOCUMENT_WORKERS * 2)
+    pending = deque()
+    next_range = 0
+    while next_range < len(ranges) or pending:
+        while next_range < len(ranges) and len(pending) < window:
+            start, end = ranges[next_range]
+            pending.append((start, pool.submit(extract_range, path, kind, start, end)))
+            next_range += 1
+        start, future = pending.popleft()
+        for offset, text in enumerate(future.result()):
+            yield f"{label} {start + offset + 1}", text
@@ -0,0 +1,96 @@
+import os
+import re
+
+from core.mapreduce import CHARS_PER_TOKEN, estimate_tokens
+
+# Extractive pre-summarization for very long transcripts. Sentences are
+# ranked with TextRank over TF-IDF cosine similarity, and the best ones are
+# kept, in their original order, up to a token budget. The model then gets a
+# dense input a fraction of the size. All scoring is sparse NumPy work:
+# bincount and fancy indexing over (sentence, term) pairs, with no Python
+# loop per sentence and no n x n similarity matrix.
+EXTRACTIVE_MIN_TOKENS = int(os.getenv("EXTRACTIVE_MIN_TOKENS", 24000))  # 0 disables the stage
+EXTRACTIVE_BUDGET_TOKENS = int(os.getenv("EXTRACTIVE_BUDGET_TOKENS", 12000))
+DAMPING = 0.85
+ITERATIONS = 30
+WINDOW_WORDS = 30  # auto captions have no punctuation: long runs are cut into windows of this size
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset(
+    "a an the and or but if so of to in on at by for with from as is are was were be been being "
+    "it its this that these those i you he she we they me him her us them my your our their "
+    "do does did have has had not no yes can will would should could just very really also then "
+    "than there here what which who how when where why all any some more most much many one "
+    "okay ok right now like about into over up down out".split()
+)
+
+
+def split_sentences(text):
+    sentences = []
+    for sentence in _SENTENCE_RE.split(text):
+        words = sentence.split()
+        if len(words) <= WINDOW_WORDS + WINDOW_WORDS // 2:
+            if words:
+                sentences.append(" ".join(words))
+            continue
+        sentences.extend(" ".join(words[i:i + WINDOW_WORDS]) for i in range(0, len(words), WINDOW_WORDS))
+    return sentences
+
+
+def content_words(text):
+    # Lower-cased words without stopwords
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def textrank_scores(sentences):
+    import numpy as np
+
+    n = len(sentences)
+    # (sentence, term) pairs for every non-stopword token
+    tokens = [(index, word) for index, sentence in enumerate(sentences)
+              for word in content_words(sentence)]
+    if not tokens:
+        return np.full(n, 1.0 / max(n, 1))
+    sentence_ids = np.fromiter((index for index, _ in tokens), dtype=np.int64, count=len(tokens))
+    vocabulary, term_ids = np.unique(np.array([word for _, word in tokens]), return_inverse=True)
+    terms = len(vocabulary)
+
+    # Sparse term counts: one entry per distinct (sentence, term) pair
+    pairs, counts = np.unique(sentence_ids * terms + term_ids, return_counts=True)
+    rows = pairs // terms
+    cols = pairs % terms
+    document_frequency = np.bincount(cols, minlength=terms)
+    values = counts * (np.log(n / document_frequency[cols]) + 1.0)
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n))
+    values = values / np.where(norms[rows] > 0, norms[rows], 1.0)
+
+    def similarity_dot(vector):
+        # (X X^T) @ vector, computed as X @ (X^T @ vector)
+        per_term = np.bincount(cols, weights=values * vector[rows], minlength=terms)
+        return np.bincount(rows, weights=values * per_term[cols], minlength=n)
+
+    # TextRank on the cosine graph without self-loops: S = X X^T - diag
+    self_similarity = np.bincount(rows, weights=values ** 2, minlength=n)
+    degree = similarity_dot(np.ones(n)) - self_similarity
+    degree = np.where(degree > 1e-12, degree, 1.0)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(ITERATIONS):
+        spread = scores / degree
+        scores = (1 - DAMPING) / n + DAMPING * (similarity_dot(spread) - self_similarity * spread)
+    return scores
+
+
+def extract_key_sentences(text, budget_tokens=EXTRACTIVE_BUDGET_TOKENS):
+    # Best-ranked sentences in original order, within budget_tokens
+    import numpy as np
+
+    sentences = split_sentences(text)
+    if estimate_tokens(text) <= budget_tokens or len(sentences) < 2:
+        return text
+    scores = textrank_scores(sentences)
+    lengths = np.fromiter((len(sentence) // CHARS_PER_TOKEN + 1 for sentence in sentences),
+                          dtype=np.int64, count=len(sentences))
+    ranked = np.argsort(-scores, kind="stable")
+    keep = ranked[np.cumsum(lengths[ranked]) <= budget_tokens]
+    return " ".join(sentences[index] for index in np.sort(keep))
@@ -0,0 +1,41 @@
+import os
+import time
+
+# Offline stand-in for genai.GenerativeModel, used for local testing and
+# benchmarks. Enable it in the app with SUMMARIZER_FAKE_MODEL=1.
+FAKE_MODEL_ENABLED = os.getenv("SUMMARIZER_FAKE_MODEL", "0") == "1"
+FAKE_MODEL_LATENCY = float(os.getenv("FAKE_MODEL_LATENCY", 0.5))  # seconds before the first chunk
+FAKE_MODEL_CHUNK_DELAY = float(os.getenv("FAKE_MODEL_CHUNK_DELAY", 0.05))
+FAKE_MODEL_WORDS = int(os.getenv("FAKE_MODEL_WORDS", 300))
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, model_name="fake", latency=None, chunk_delay=None, words=None):
+        self.model_name = model_name
+        self.latency = FAKE_MODEL_LATENCY if latency is None else latency
+        self.chunk_delay = FAKE_MODEL_CHUNK_DELAY if chunk_delay is None else chunk_delay
+        self.words = FAKE_MODEL_WORDS if words is None else words
+
+    def _chunks(self, contents):
+        # Echo the start of the input so different prompts give different summaries
+        source = contents.split() or ["summary"]
+        words = [source[i % len(source)] for i in range(self.words)]
+        yield "## Summary\n\n"
+        for start in range(0, len(words), 20):
+            yield "* " + " ".join(words[start:start + 20]) + "\n"
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        time.sleep(self.latency)
+        if not stream:
+            return FakeResponse("".join(self._chunks(contents)))
+        return self._stream(contents)
+
+    def _stream(self, contents):
+        for chunk in self._chunks(contents):
+            yield FakeResponse(chunk)
+            time.sleep(self.chunk_delay)
@@ -0,0 +1,236 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent diagram image store shared by every Streamlit session and rerun.
+# Files are named by the SHA-256 of their bytes, search queries map to lists
+# of stored images, near-identical images (same picture re-encoded or resized)
+# are folded together with a perceptual hash, and a display-size JPEG
+# thumbnail is generated once per image.
+STORE_DIR = os.getenv("IMAGE_STORE_DIR", "temp_images")
+STORE_MAX_BYTES = int(os.getenv("IMAGE_STORE_MAX_BYTES", 200 * 1024 * 1024))
+THUMBNAIL_WIDTH = int(os.getenv("IMAGE_THUMBNAIL_WIDTH", 700))
+SESSION_REF_TTL = int(os.getenv("IMAGE_SESSION_REF_TTL", 3600))  # seconds a session pins its images
+DUPLICATE_DISTANCE = 6  # max differing bits (of 64) for two images to count as the same picture
+
+
+def perceptual_hash(image):
+    # 64-bit difference hash: shrink to 9x8 greyscale and compare neighbours
+    import numpy as np
+    from PIL import Image
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    value = int(np.packbits(bits).view(">u8")[0])
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _hamming_distances(target, hashes):
+    import numpy as np
+    values = np.array(hashes, dtype=np.int64).view(np.uint64) ^ np.uint64(target & ((1 << 64) - 1))
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class ImageStore:
+    def __init__(self, root=STORE_DIR, max_bytes=STORE_MAX_BYTES, thumbnail_width=THUMBNAIL_WIDTH):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.thumbnail_width = thumbnail_width
+        self._local = threading.local()
+        os.makedirs(os.path.join(root, "images"), exist_ok=True)
+        os.makedirs(os.path.join(root, "thumbs"), exist_ok=True)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), timeout=30,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " digest TEXT PRIMARY KEY, ext TEXT NOT NULL, size INTEGER NOT NULL,"
+            " phash INTEGER, created REAL NOT NULL, last_access REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS queries ("
+            " query TEXT NOT NULL, position INTEGER NOT NULL, digest TEXT NOT NULL,"
+            " PRIMARY KEY (query, position));"
+            "CREATE TABLE IF NOT EXISTS session_refs ("
+            " session_id TEXT NOT NULL, digest TEXT NOT NULL, touched REAL NOT NULL,"
+            " PRIMARY KEY (session_id, digest));"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def image_path(self, digest, ext):
+        return os.path.join(self.root, "images", digest + ext)
+
+    def thumbnail_path(self, digest):
+        return os.path.join(self.root, "thumbs", f"{digest}_{self.thumbnail_width}.jpg")
+
+    def display_path(self, digest, ext):
+        # Thumbnail when one exists (Pillow installed and image decodable), else the original
+        thumb = self.thumbnail_path(digest)
+        return thumb if os.path.exists(thumb) else self.image_path(digest, ext)
+
+    def lookup_query(self, query, session_id=None):
+        # Display paths previously stored for this search query, or None
+        rows = self._connect().execute(
+            "SELECT images.digest, images.ext FROM queries JOIN images USING (digest)"
+            " WHERE query = ? ORDER BY position", (query,)
+        ).fetchall()
+        paths = [self.display_path(digest, ext) for digest, ext in rows
+                 if os.path.exists(self.image_path(digest, ext))]
+        if not paths:
+            return None
+        self._touch([digest for digest, _ in rows], session_id)
+        return paths
+
+    def pin(self, paths, session_id=None):
+        # Re-pins display paths handed out earlier (e.g. from an in-process memo)
+        # for this session. None when any of them has been evicted since.
+        if not paths or not all(os.path.exists(path) for path in paths):
+            return None
+        digests = [os.path.basename(path).split(".")[0].split("_")[0] for path in paths]
+        self._touch(digests, session_id)
+        return paths
+
+    def store_query(self, query, images, session_id=None):
+        # images: iterable of (bytes, extension). Returns display paths, with
+        # exact and near duplicates collapsed.
+        digests = []
+        for data, ext in images:
+            digest, ext = self.put(data, ext)
+            if (digest, ext) not in digests:
+                digests.append((digest, ext))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM queries WHERE query = ?", (query,))
+            conn.executemany(
+                "INSERT INTO queries (query, position, digest) VALUES (?, ?, ?)",
+                [(query, position, digest) for position, (digest, _) in enumerate(digests)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._touch([digest for digest, _ in digests], session_id)
+        self.evict()
+        return [self.display_path(digest, ext) for digest, ext in digests]
+
+    def put(self, data, ext):
+        digest = hashlib.sha256(data).hexdigest()
+        conn = self._connect()
+        row = conn.execute("SELECT ext FROM images WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            return digest, row[0]
+
+        image = None
+        phash = None
+        try:
+            from PIL import Image
+            image = Image.open(io.BytesIO(data))
+            image.load()
+            phash = perceptual_hash(image)
+        except Exception:
+            pass  # Pillow/NumPy missing or undecodable image: exact dedup only
+
+        if phash is not None:
+            duplicate = self._find_near_duplicate(conn, phash)
+            if duplicate is not None:
+                return duplicate
+
+        path = self.image_path(digest, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        size = len(data)
+        if image is not None:
+            size += self._write_thumbnail(image, digest)
+
+        now = time.time()
+        conn.execute(
+            "INSERT OR IGNORE INTO images (digest, ext, size, phash, created, last_access)"
+            " VALUES (?, ?, ?, ?, ?, ?)", (digest, ext, size, phash, now, now)
+        )
+        return digest, ext
+
+    def _find_near_duplicate(self, conn, phash):
+        rows = conn.execute(
+            "SELECT digest, ext, phash FROM images WHERE phash IS NOT NULL"
+        ).fetchall()
+        if not rows:
+            return None
+        distances = _hamming_distances(phash, [row[2] for row in rows])
+        best = int(distances.argmin())
+        if distances[best] <= DUPLICATE_DISTANCE:
+            return rows[best][0], rows[best][1]
+        return None
+
+    def _write_thumbnail(self, image, digest):
+        try:
+            thumb = image.convert("RGB")
+            if thumb.width > self.thumbnail_width:
+                height = max(1, round(thumb.height * self.thumbnail_width / thumb.width))
+                thumb = thumb.resize((self.thumbnail_width, height))
+            path = self.thumbnail_path(digest)
+            thumb.save(path + ".tmp", format="JPEG", quality=85, optimize=True)
+            os.replace(path + ".tmp", path)
+            return os.path.getsize(path)
+        except Exception:
+            return 0
+
+    def _touch(self, digests, session_id):
+        now = time.time()
+        conn = self._connect()
+        conn.executemany("UPDATE images SET last_access = ? WHERE digest = ?",
+                         [(now, digest) for digest in digests])
+        if session_id:
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_refs (session_id, digest, touched) VALUES (?, ?, ?)",
+                [(session_id, digest, now) for digest in digests],
+            )
+
+    def release_session(self, session_id):
+        self._connect().execute("DELETE FROM session_refs WHERE session_id = ?", (session_id,))
+
+    def evict(self):
+        # LRU by total bytes; images referenced by a live session are kept
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM session_refs WHERE touched < ?", (now - SESSION_REF_TTL,))
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()
+        if total <= self.max_bytes:
+            return
+        for digest, ext, size in conn.execute(
+            "SELECT digest, ext, size FROM images"
+            " WHERE digest NOT IN (SELECT digest FROM session_refs)"
+            " ORDER BY last_access ASC"
+        ).fetchall():
+            conn.execute("DELETE FROM images WHERE digest = ?", (digest,))
+            conn.execute("DELETE FROM queries WHERE digest = ?", (digest,))
+            for path in (self.image_path(digest, ext), self.thumbnail_path(digest)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
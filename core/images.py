@@ -0,0 +1,87 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Concurrent diagram downloads over one pooled HTTP session. fetch_images()
+# returns as soon as enough images have arrived; it never waits for the
+# slower downloads still in flight, nor for the sum of all of them.
+IMAGE_TIMEOUT = float(os.getenv("IMAGE_TIMEOUT", 5))  # seconds, connect and per read
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", 5 * 1024 * 1024))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 5))
+
+_CHUNK_SIZE = 64 * 1024
+_EXTENSIONS = {
+    "image/jpeg": ".jpg", "image/jpg": ".jpg", "image/png": ".png",
+    "image/gif": ".gif", "image/webp": ".webp",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=IMAGE_WORKERS * 2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "Mozilla/5.0"
+            _session = session
+        return _session
+
+
+def fetch_image(url, timeout=IMAGE_TIMEOUT, max_bytes=IMAGE_MAX_BYTES, cancelled=None):
+    # Returns (bytes, extension), or None if the URL is not a usable image.
+    try:
+        with get_session().get(url, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                return None
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type not in _EXTENSIONS:
+                return None
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > max_bytes:
+                return None
+            data = bytearray()
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                data.extend(chunk)
+                if len(data) > max_bytes:
+                    return None
+            return (bytes(data), _EXTENSIONS[content_type]) if data else None
+    except Exception:
+        return None
+
+
+def fetch_images(urls, wanted, max_workers=IMAGE_WORKERS):
+    # Downloads candidates concurrently and returns up to `wanted` images as
+    # (url, bytes, extension) in the order the candidates were given. Stops as
+    # soon as enough good images have arrived.
+    urls = list(urls)
+    if not urls or wanted <= 0:
+        return []
+    cancelled = threading.Event()
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))))
+    try:
+        futures = {pool.submit(fetch_image, url, cancelled=cancelled): index
+                   for index, url in enumerate(urls)}
+        pending = set(futures)
+        while pending and len(results) < wanted:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                image = future.result()
+                if image is not None:
+                    results[futures[future]] = image
+    finally:
+        # Enough images: abort downloads in progress and skip the queued ones
+        # without waiting for them; stragglers stop at their next chunk or timeout
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    ordered = sorted(results.items())[:wanted]
+    return [(urls[index], data, extension) for index, (data, extension) in ordered]
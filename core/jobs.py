@@ -0,0 +1,229 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from core.disk_cache import DEFAULT_DB_PATH
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", DEFAULT_DB_PATH)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", 64))
+JOB_TTL = int(os.getenv("JOB_TTL", 3600))  # seconds finished jobs stay pollable
+# Queued/running jobs not updated for this long lost their worker (restart,
+# crash) and are failed so clients stop polling
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", 1800))
+# Serverless platforms freeze threads once the response is sent and route polls
+# to other instances with their own /tmp, so jobs are off there by default
+BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "0" if os.getenv("VERCEL") else "1") == "1"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "error"
+
+STALE_JOB_MESSAGE = "Error: the job was interrupted, please try again"
+
+
+class JobError(Exception):
+    # Raised by a job function for failures that should be shown to the user as-is
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobStore:
+    # Job state lives in SQLite so that any gunicorn worker can answer a status
+    # poll, not just the one whose thread pool is running the job.
+
+    def __init__(self, path=JOB_DB_PATH, ttl=JOB_TTL, stale_after=JOB_STALE_AFTER):
+        self.path = path
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " params TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " created REAL NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        # A batch is only the ordered list of its jobs; each video is its own job
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " id TEXT PRIMARY KEY,"
+            " jobs TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def create(self, params):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.execute("DELETE FROM jobs WHERE updated < ? AND status IN (?, ?)",
+                     (now - self.ttl, DONE, FAILED))
+        conn.execute("UPDATE jobs SET status = ?, stage = NULL, error = ?, updated = ?"
+                     " WHERE updated < ? AND status IN (?, ?)",
+                     (FAILED, STALE_JOB_MESSAGE, now, now - self.stale_after, QUEUED, RUNNING))
+        conn.execute(
+            "INSERT INTO jobs (id, status, params, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(params), now, now),
+        )
+        return job_id
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._connect().execute(
+            f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+        )
+
+    def get(self, job_id):
+        row = self._connect().execute(
+            "SELECT id, status, stage, params, result, error, created, updated"
+            " FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("id", "status", "stage", "params", "result", "error",
+                        "created", "updated"), row))
+        job["params"] = json.loads(job["params"]) if job["params"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if job["status"] in (QUEUED, RUNNING) and job["updated"] < time.time() - self.stale_after:
+            self.update(job_id, status=FAILED, stage=None, error=STALE_JOB_MESSAGE)
+            job.update(status=FAILED, stage=None, error=STALE_JOB_MESSAGE)
+        return job
+
+    def create_batch(self, job_ids):
+        batch_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.execute("DELETE FROM batches WHERE created < ?", (now - self.ttl,))
+        conn.execute("INSERT INTO batches (id, jobs, created) VALUES (?, ?, ?)",
+                     (batch_id, json.dumps(job_ids), now))
+        return batch_id
+
+    def get_batch(self, batch_id):
+        # Job ids of the batch in submission order, or None
+        row = self._connect().execute(
+            "SELECT jobs FROM batches WHERE id = ?", (batch_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+class JobQueue:
+    def __init__(self, store=None, workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING):
+        self.store = store or JobStore()
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._pending = 0
+        self._finished = {}  # job_id -> Event, for jobs running in this process
+        self._lock = threading.Lock()
+
+    def _reserve(self, count):
+        with self._lock:
+            if self._pending + count > self.max_pending:
+                raise QueueFull("Too many summaries in progress, please try again shortly")
+            self._pending += count
+
+    def _start(self, fn, params):
+        job_id = self.store.create(params)
+        with self._lock:
+            self._finished[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id, fn, params)
+        return job_id
+
+    def submit(self, fn, **params):
+        # fn(set_stage, **params) runs on the pool; its return value must be JSON-able
+        self._reserve(1)
+        try:
+            return self._start(fn, params)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def _run(self, job_id, fn, params):
+        try:
+            self.store.update(job_id, status=RUNNING)
+            result = fn(lambda stage: self.store.update(job_id, stage=stage), **params)
+            self.store.update(job_id, status=DONE, stage=None, result=result)
+        except JobError as e:
+            self.store.update(job_id, status=FAILED, error=str(e))
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=f"Unexpected error: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                finished = self._finished.pop(job_id, None)
+            if finished is not None:
+                finished.set()
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def submit_batch(self, fn, items):
+        # One job per params dict in items, grouped under a batch id. Room for
+        # the whole batch is reserved in one step, so a concurrent submit cannot
+        # leave it half queued.
+        self._reserve(len(items))
+        started = 0
+        try:
+            job_ids = []
+            for params in items:
+                job_ids.append(self._start(fn, params))
+                started += 1
+            return self.store.create_batch(job_ids)
+        except Exception:
+            with self._lock:
+                self._pending -= len(items) - started
+            raise
+
+    def get_batch(self, batch_id):
+        # [job] in submission order, or None for an unknown batch
+        job_ids = self.store.get_batch(batch_id)
+        if job_ids is None:
+            return None
+        return [self.store.get(job_id) for job_id in job_ids]
+
+    def wait(self, job_id, timeout):
+        # Blocks until a job submitted by this process finishes or timeout
+        # seconds pass, then returns its current state
+        with self._lock:
+            finished = self._finished.get(job_id)
+        if finished is not None:
+            finished.wait(timeout)
+        return self.store.get(job_id)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    # Created lazily so each forked worker gets its own thread pool
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,72 @@
+import importlib.util
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.mapreduce import estimate_tokens, split_into_chunks
+
+# Offline summarizer on CPU (transformers "summarization" pipeline). It is
+# loaded once per worker process. Every chunk of a transcript goes through
+# one batched pipeline call on a dedicated thread, so inference never runs on
+# request threads and never oversubscribes the CPU. transformers/torch are
+# optional: without them the backend reports itself unavailable.
+LOCAL_MODEL = os.getenv("LOCAL_MODEL", "sshleifer/distilbart-cnn-12-6")
+LOCAL_MODEL_BATCH = int(os.getenv("LOCAL_MODEL_BATCH", 8))
+LOCAL_MODEL_CHUNK_TOKENS = int(os.getenv("LOCAL_MODEL_CHUNK_TOKENS", 700))  # BART reads at most 1024
+LOCAL_MODEL_THREADS = int(os.getenv("LOCAL_MODEL_THREADS", 0))  # torch intra-op threads, 0 = torch default
+LOCAL_MODEL_MAX_LENGTH = int(os.getenv("LOCAL_MODEL_MAX_LENGTH", 150))  # tokens per chunk summary
+LOCAL_MODEL_MIN_LENGTH = int(os.getenv("LOCAL_MODEL_MIN_LENGTH", 40))
+
+# Rounds of summarizing the chunk summaries again when they are still too long
+_MAX_ROUNDS = 3
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-model")
+_pipeline = None
+_load_lock = threading.Lock()
+
+
+def local_model_available():
+    return LOCAL_MODEL != "off" and importlib.util.find_spec("transformers") is not None
+
+
+def _get_pipeline():
+    global _pipeline
+    with _load_lock:
+        if _pipeline is None:
+            if LOCAL_MODEL_THREADS:
+                import torch
+                torch.set_num_threads(LOCAL_MODEL_THREADS)
+            from transformers import pipeline
+            _pipeline = pipeline("summarization", model=LOCAL_MODEL, device=-1)
+        return _pipeline
+
+
+def _summarize_batch(chunks):
+    # Runs on the dedicated thread: one pipeline call for all chunks
+    summarizer = _get_pipeline()
+    outputs = summarizer(chunks, batch_size=LOCAL_MODEL_BATCH, truncation=True, do_sample=False,
+                         max_length=LOCAL_MODEL_MAX_LENGTH, min_length=LOCAL_MODEL_MIN_LENGTH)
+    return [output["summary_text"].strip() for output in outputs]
+
+
+def warm_up_local_model():
+    if local_model_available():
+        _executor.submit(_get_pipeline).result()
+
+
+def local_summarize(transcript):
+    # Returns Markdown bullet notes (the prompt is not used: the model only summarizes).
+    # Raises on failure.
+    text = transcript
+    for _ in range(_MAX_ROUNDS):
+        chunks = split_into_chunks(text, LOCAL_MODEL_CHUNK_TOKENS)
+        if not chunks:
+            raise ValueError("No text found to summarize")
+        summaries = _executor.submit(_summarize_batch, chunks).result()
+        text = " ".join(summaries)
+        if len(chunks) == 1 or estimate_tokens(text) <= LOCAL_MODEL_CHUNK_TOKENS:
+            break
+    points = [sentence.strip() for sentence in _SENTENCE_RE.split(text) if sentence.strip()]
+    return "## Summary\n\n" + "\n".join(f"* {point}" for point in points)
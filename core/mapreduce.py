@@ -0,0 +1,170 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Transcripts above CHUNK_TOKENS are split, summarized chunk by chunk on a
+# bounded pool, then merged. Token counts are estimates (~4 chars per token).
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 8000))
+MAP_WORKERS = int(os.getenv("SUMMARY_MAP_WORKERS", 4))
+CHARS_PER_TOKEN = 4
+
+MAP_PROMPT = """
+You are summarizing part {index} of {total} of a single lecture transcript or document.
+Write dense notes for this part only: keep every definition, classification, step,
+formula, example, merit/demerit and application that is mentioned, plus any point
+where a diagram is described. Do not add an introduction or conclusion.
+
+Part {index}:
+"""
+
+REDUCE_PROMPT = """
+
+The text below is not a raw transcript. It is a set of notes taken from consecutive
+parts of one video, in order. Merge them into a single answer that follows the
+instructions above exactly, removing repetition between parts.
+
+Notes:
+"""
+
+CONDENSE_PROMPT = """
+Merge these notes from consecutive parts of one lecture video into a single set of
+dense notes. Keep every technical detail, remove repetition, and do not add an
+introduction or conclusion.
+
+Notes:
+"""
+
+# Condensing rounds before the reduce step is forced through in one request
+MAX_REDUCE_DEPTH = 3
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    # Cut on sentence boundaries where the transcript has punctuation, and on
+    # word boundaries otherwise (auto captions often have none).
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_len = 0
+    for sentence in _SENTENCE_RE.split(text):
+        pieces = [sentence] if len(sentence) <= max_chars else _split_words(sentence, max_chars)
+        for piece in pieces:
+            if current and current_len + len(piece) + 1 > max_chars:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += len(piece) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _split_words(text, max_chars):
+    pieces = []
+    current = []
+    current_len = 0
+    for word in text.split():
+        if current and current_len + len(word) + 1 > max_chars:
+            pieces.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(word)
+        current_len += len(word) + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def map_reduce_summarize(transcript, prompt, generate,
+                         chunk_tokens=CHUNK_TOKENS, max_workers=MAP_WORKERS):
+    # generate(text) -> str sends one request to the model and raises on failure.
+    # Short transcripts go through in a single call, exactly as before.
+    if estimate_tokens(prompt + transcript) <= chunk_tokens:
+        return generate(prompt + transcript)
+    partials = map_stage(transcript, generate, chunk_tokens, max_workers)
+    return reduce_stage(partials, prompt, generate, chunk_tokens, max_workers)
+
+
+def map_stage(transcript, generate, chunk_tokens=CHUNK_TOKENS, max_workers=MAP_WORKERS):
+    # Per-chunk notes. They do not depend on the user's prompt, so they can be
+    # reused for every prompt run against the same transcript.
+    chunks = split_into_chunks(transcript, chunk_tokens)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        return list(pool.map(
+            lambda item: generate(MAP_PROMPT.format(index=item[0] + 1, total=len(chunks)) + item[1]),
+            enumerate(chunks),
+        ))
+
+
+def reduce_stage(partials, prompt, generate, chunk_tokens=CHUNK_TOKENS, max_workers=MAP_WORKERS):
+    return _reduce(partials, prompt, generate, chunk_tokens, max_workers, 0)
+
+
+def _reduce(partials, prompt, generate, chunk_tokens, max_workers, depth):
+    notes = "\n\n".join(f"--- Part {i + 1} ---\n{p}" for i, p in enumerate(partials))
+    if (estimate_tokens(prompt + REDUCE_PROMPT + notes) <= chunk_tokens
+            or len(partials) == 1 or depth >= MAX_REDUCE_DEPTH):
+        return generate(prompt + REDUCE_PROMPT + notes)
+
+    # Too many partial notes for one request: condense them in groups first
+    groups = []
+    current = []
+    for partial in partials:
+        if current and estimate_tokens("\n\n".join(current + [partial])) > chunk_tokens // 2:
+            groups.append(current)
+            current = []
+        current.append(partial)
+    groups.append(current)
+    if len(groups) == len(partials):
+        # Every partial is already near the budget; merge them in pairs instead
+        groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as pool:
+        condensed = list(pool.map(
+            lambda group: generate(CONDENSE_PROMPT + "\n\n".join(group)),
+            groups,
+        ))
+    return _reduce(condensed, prompt, generate, chunk_tokens, max_workers, depth + 1)
+
+
+def map_reduce_stream(pieces, prompt, generate,
+                      chunk_tokens=CHUNK_TOKENS, max_workers=MAP_WORKERS):
+    # Same as map_reduce_summarize, but for text that arrives piece by piece
+    # (e.g. document pages). Each chunk is sent to the map stage as soon as it
+    # is full, so summarizing overlaps with extraction.
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+    buffer = []
+    buffer_len = 0
+    chunks_started = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        def flush():
+            text = "\n\n".join(buffer)
+            chunks_started.append(pool.submit(
+                lambda index: generate(MAP_PROMPT.format(index=index, total="several") + text),
+                len(chunks_started) + 1,
+            ))
+
+        for piece in pieces:
+            if not piece.strip():
+                continue
+            for part in ([piece] if len(piece) <= max_chars else split_into_chunks(piece, chunk_tokens)):
+                if buffer and buffer_len + len(part) + 2 > max_chars:
+                    flush()
+                    buffer, buffer_len = [], 0
+                buffer.append(part)
+                buffer_len += len(part) + 2
+
+        if not chunks_started:
+            # Everything fitted in one chunk: a single request, as for short transcripts
+            text = "\n\n".join(buffer)
+            if not text.strip():
+                raise ValueError("No text found to summarize")
+            return map_reduce_summarize(text, prompt, generate, chunk_tokens, max_workers)
+        if buffer:
+            flush()
+        partials = [future.result() for future in chunks_started]
+    return _reduce(partials, prompt, generate, chunk_tokens, max_workers, 0)
@@ -0,0 +1,155 @@
+import os
+import re
+import tempfile
+import threading
+import time
+
+from core.memo import memoize
+
+# Media downloads are streamed straight from YouTube's servers to the client.
+# yt_dlp is only used to resolve the direct URL of the chosen format; complete
+# downloads are kept on local disk for a while so repeat requests (and resumed
+# ones) are served locally.
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "media_cache"))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+MEDIA_CACHE_MAX_FILE = int(os.getenv("MEDIA_CACHE_MAX_FILE", 300 * 1024 * 1024))
+MEDIA_MAX_DOWNLOADS = int(os.getenv("MEDIA_MAX_DOWNLOADS", 4))
+
+# media_type -> (yt_dlp format selector, MIME type). Only single-file formats,
+# so there is nothing to merge or transcode and the bytes can be passed through.
+MEDIA_FORMATS = {
+    "mp4": ("best[ext=mp4][vcodec!=none][acodec!=none]/best[ext=mp4]/best", "video/mp4"),
+    "mp3": ("bestaudio[ext=m4a]/bestaudio[ext=mp3]/bestaudio", "audio/mp4"),
+}
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+_download_slots = threading.BoundedSemaphore(MEDIA_MAX_DOWNLOADS)
+
+
+class MediaError(Exception):
+    pass
+
+
+def valid_video_id(video_id):
+    return bool(_VIDEO_ID_RE.match(video_id or ""))
+
+
+def acquire_slot(timeout=2):
+    return _download_slots.acquire(timeout=timeout)
+
+
+def release_slot():
+    _download_slots.release()
+
+
+# Resolved URLs stay valid for a few hours; keep them well under that
+@memoize("media_format", ttl=30 * 60, max_entries=256)
+def resolve_format(video_id, media_type):
+    if media_type not in MEDIA_FORMATS:
+        raise MediaError(f"Unsupported media type: {media_type}")
+    import yt_dlp
+
+    options = {"format": MEDIA_FORMATS[media_type][0], "quiet": True, "no_warnings": True,
+               "skip_download": True, "noplaylist": True}
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+    if not info.get("url"):
+        raise MediaError("No downloadable format found")
+    return {
+        "url": info["url"],
+        "headers": dict(info.get("http_headers") or {}),
+        "ext": info.get("ext") or ("mp4" if media_type == "mp4" else "m4a"),
+        "title": info.get("title") or video_id,
+        "filesize": info.get("filesize") or info.get("filesize_approx"),
+    }
+
+
+def download_name(title, ext):
+    # Plain ASCII so it fits in a Content-Disposition header as-is
+    safe = re.sub(r'[\\/:*?"<>|]+', "", title).encode("ascii", "ignore").decode().strip()
+    safe = safe or "download"
+    return f"{safe[:100]}.{ext}"
+
+
+def cached_path(video_id, media_type):
+    # A complete earlier download of this format, if still cached
+    prefix = f"{video_id}.{media_type}."
+    try:
+        for name in os.listdir(MEDIA_CACHE_DIR):
+            if name.startswith(prefix) and not name.endswith(".part"):
+                path = os.path.join(MEDIA_CACHE_DIR, name)
+                os.utime(path)  # mark as recently used
+                return path
+    except FileNotFoundError:
+        pass
+    return None
+
+
+class CacheWriter:
+    # Tees a full (non-range) download into the cache while it streams out.
+    # The file only becomes visible once every byte has arrived.
+    def __init__(self, video_id, media_type, ext):
+        os.makedirs(MEDIA_CACHE_DIR, exist_ok=True)
+        self.path = os.path.join(MEDIA_CACHE_DIR, f"{video_id}.{media_type}.{ext}")
+        self.part_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.part"
+        self._file = open(self.part_path, "wb")
+        self.size = 0
+        self.failed = False
+
+    def write(self, chunk):
+        if self.failed:
+            return
+        self.size += len(chunk)
+        if self.size > MEDIA_CACHE_MAX_FILE:
+            self.abort()
+            return
+        self._file.write(chunk)
+
+    def commit(self, expected_size=None):
+        if self.failed:
+            return
+        self._file.close()
+        if expected_size is not None and self.size != expected_size:
+            self.abort()
+            return
+        os.replace(self.part_path, self.path)
+        evict()
+
+    def abort(self):
+        self.failed = True
+        self._file.close()
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+
+def evict():
+    # Least recently used files go first once the cache is over its size limit
+    entries = []
+    for name in os.listdir(MEDIA_CACHE_DIR):
+        path = os.path.join(MEDIA_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if name.endswith(".part"):
+            # Leftovers from interrupted downloads
+            if time.time() - stat.st_mtime > 3600:
+                _remove(path)
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= MEDIA_CACHE_MAX_BYTES:
+            break
+        _remove(path)
+        total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
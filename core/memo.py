@@ -0,0 +1,104 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# In-process memoization for the Streamlit front-ends. Streamlit re-executes
+# the script on every widget interaction, but imported modules survive, so a
+# cache kept here is shared by every rerun and every session in the server
+# process. Each memoized stage keeps its own TTL, entry cap and counters.
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class Memo:
+    def __init__(self, name, ttl, max_entries):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _make_key(args, kwargs):
+    # Hash the arguments so long transcripts are not kept around as dict keys
+    return hashlib.sha256(repr((args, sorted(kwargs.items()))).encode("utf-8")).hexdigest()
+
+
+def _is_error(value):
+    return isinstance(value, str) and value.startswith("Error")
+
+
+def memoize(name, ttl=3600, max_entries=128, cache_if=None):
+    # cache_if(result) -> bool; by default "Error ..." strings and None are not cached
+    def decorator(fn):
+        with _registry_lock:
+            memo = _registry.get(name)
+            if memo is None:
+                memo = _registry[name] = Memo(name, ttl, max_entries)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            found, value = memo.get(key)
+            if found:
+                return value
+            value = fn(*args, **kwargs)
+            keep = cache_if(value) if cache_if else (value is not None and not _is_error(value))
+            if keep:
+                memo.put(key, value)
+            return value
+
+        wrapper.memo = memo
+        wrapper.forget = lambda *args, **kwargs: memo.discard(_make_key(args, kwargs))
+        return wrapper
+    return decorator
+
+
+def memo_stats():
+    with _registry_lock:
+        memos = list(_registry.values())
+    return {memo.name: memo.stats() for memo in memos}
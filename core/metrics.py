@@ -0,0 +1,133 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-stage timing and size metrics, kept in memory so they are cheap enough
+# to leave on: recording a stage is a perf_counter() pair, one bisect and a
+# few additions under a lock. Each worker process keeps its own numbers and
+# labels them with its pid.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)  # seconds
+SIZE_BUCKETS = (1000, 5000, 20000, 50000, 100000, 200000, 500000, 1000000)  # characters
+
+# Stage timings of the current request, for its Server-Timing header
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}  # stage -> Histogram
+        self.sizes = {}  # kind -> Histogram
+        self.errors = {}  # stage -> count
+        self.counters = {}  # name -> running total
+
+    def observe_stage(self, stage, seconds):
+        with self._lock:
+            histogram = self.latency.get(stage)
+            if histogram is None:
+                histogram = self.latency[stage] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_size(self, kind, chars):
+        with self._lock:
+            histogram = self.sizes.get(kind)
+            if histogram is None:
+                histogram = self.sizes[kind] = Histogram(SIZE_BUCKETS)
+            histogram.observe(chars)
+
+    def count_error(self, stage):
+        with self._lock:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def render(self):
+        # Prometheus text exposition format
+        pid = os.getpid()
+        lines = []
+        with self._lock:
+            lines += _histogram_lines(
+                "summarizer_stage_seconds", "Time spent in each request stage.",
+                "stage", self.latency, pid)
+            lines += [
+                "# HELP summarizer_stage_errors_total Failures by request stage.",
+                "# TYPE summarizer_stage_errors_total counter",
+            ]
+            lines += [f'summarizer_stage_errors_total{{stage="{stage}",pid="{pid}"}} {count}'
+                      for stage, count in sorted(self.errors.items())]
+            for name, total in sorted(self.counters.items()):
+                lines += [f"# TYPE summarizer_{name}_total counter",
+                          f'summarizer_{name}_total{{pid="{pid}"}} {total}']
+            lines += _histogram_lines(
+                "summarizer_text_chars", "Size of transcripts and summaries in characters.",
+                "kind", self.sizes, pid)
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, help_text, label, histograms, pid):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        labels = f'{label}="{key}",pid="{pid}"'
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+def start_request():
+    _request_timings.set([])
+
+
+def request_timings():
+    # [(stage, seconds)] recorded so far in this request, or [] outside one
+    return _request_timings.get() or []
+
+
+@contextmanager
+def timed(stage):
+    # Times the block into the stage histogram and the request's Server-Timing;
+    # an exception escaping the block counts as an error for the stage.
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        _metrics.count_error(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _metrics.observe_stage(stage, elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings)
@@ -0,0 +1,322 @@
+import os
+import random
+import threading
+import time
+
+from core.compaction import COMPACTION_ENABLED, compact_transcript, compaction_savings
+from core.context_cache import (
+    context_enabled, create_remote_context, forget_remote_model, get_cache as get_context_cache,
+    mark_unsupported, remote_context_supported, remote_model
+)
+from core.documents import file_digest, iter_pages
+from core.extractive import EXTRACTIVE_MIN_TOKENS, extract_key_sentences
+from core.fake_model import FAKE_MODEL_ENABLED, FakeModel
+from core.local_model import local_model_available, local_summarize, warm_up_local_model
+from core.rate_limit import RATE_LIMITED_MESSAGE, RateLimited, get_limiter
+from core.metrics import get_metrics, timed
+from core.mapreduce import (
+    CHUNK_TOKENS, estimate_tokens, map_reduce_stream, map_reduce_summarize, map_stage, reduce_stage
+)
+from core.singleflight import get_flights
+from core.summary_cache import get_cache as get_summary_cache, summary_key
+from core.transcript_cache import fetch_transcript
+
+# The one place the Gemini SDK is configured. Every front-end (Flask app and
+# Streamlit scripts) goes through here, so they all share one configured client,
+# one model object per model name, and the same retry behaviour.
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 2))
+RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", 1.0))  # seconds
+
+# Offline CPU summarizer (core.local_model), addressed by this model name.
+# SUMMARY_FALLBACK=local uses it when Gemini fails; CONCISE_BACKEND=local
+# sends the "concise" option to it directly.
+LOCAL_MODEL_NAME = "local"
+SUMMARY_FALLBACK = os.getenv("SUMMARY_FALLBACK", "local")
+CONCISE_BACKEND = os.getenv("CONCISE_BACKEND", "gemini")
+FALLBACK_NOTE = "*Gemini is unavailable right now, so this summary was made by the offline model.*\n\n"
+
+# google.api_core exception names that are worth retrying
+_TRANSIENT_ERRORS = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "TooManyRequests", "Aborted",
+}
+
+_lock = threading.Lock()
+_configured = False
+_models = {}
+
+
+class SummaryError(Exception):
+    # Carries an "Error ..." message that is ready to show to the user
+    pass
+
+
+def _configure():
+    global _configured
+    if not _configured:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        _configured = True
+
+
+def get_model(model_name=MODEL_NAME):
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            if FAKE_MODEL_ENABLED:
+                model = FakeModel(model_name)
+            else:
+                _configure()
+                import google.generativeai as genai
+                model = genai.GenerativeModel(model_name)
+            _models[model_name] = model
+        return model
+
+
+def warm_up(model_name=MODEL_NAME):
+    # Import the SDK, configure it and build the model before the first request
+    # (called from gunicorn's post_worker_init hook and the Streamlit scripts).
+    get_model(model_name)
+    get_summary_cache()
+    if CONCISE_BACKEND == "local":
+        warm_up_local_model()
+
+
+def summary_model_for(prompt_option):
+    if prompt_option == "concise" and CONCISE_BACKEND == "local" and local_model_available():
+        return LOCAL_MODEL_NAME
+    return MODEL_NAME
+
+
+def _should_fall_back(model_name):
+    return model_name != LOCAL_MODEL_NAME and SUMMARY_FALLBACK == "local" and local_model_available()
+
+
+def _is_transient(error):
+    return type(error).__name__ in _TRANSIENT_ERRORS or "429" in str(error)
+
+
+def _is_quota_error(error):
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+def _with_retries(call, model_name=MODEL_NAME, tokens=0):
+    # Every attempt goes through the cross-worker rate limiter, which queues
+    # the call briefly under a burst. Quota errors put all workers into a
+    # shared cooldown instead of each one sleeping on its own.
+    limiter = get_limiter()
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(model_name, tokens)
+        try:
+            result = call()
+        except Exception as e:
+            quota = _is_quota_error(e)
+            if quota:
+                limiter.report_quota_error(model_name)
+            if attempt == MAX_RETRIES or not _is_transient(e):
+                if quota:
+                    raise RateLimited(RATE_LIMITED_MESSAGE) from e
+                raise
+            if not quota:
+                time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+            continue
+        limiter.report_success(model_name)
+        return result
+
+
+def _response_text(response):
+    if not hasattr(response, "text"):
+        raise ValueError("Unexpected response format")
+    return response.text
+
+
+def generate_text(text, model_name=MODEL_NAME):
+    # A single model request. Raises on failure.
+    return _with_retries(lambda: _response_text(get_model(model_name).generate_content(text)),
+                         model_name, estimate_tokens(text))
+
+
+def extract_transcript(video_id, languages=("en",)):
+    try:
+        return fetch_transcript(video_id, languages=languages).text
+    except Exception as e:
+        return f"Error extracting transcript: {str(e)}"
+
+
+def prepare_transcript(transcript, model_name=None):
+    # Stages between transcript extraction and the model call: compaction, then
+    # extractive pre-summarization for very long transcripts. Transcripts big
+    # enough for model-side cached content keep their full text: caching it is
+    # what makes later prompts for the same video cheap.
+    metrics = get_metrics()
+    if COMPACTION_ENABLED:
+        with timed("compaction"):
+            compacted = compact_transcript(transcript)
+        savings = compaction_savings(transcript, compacted)
+        metrics.count("compaction_chars_saved", savings["chars_saved"])
+        metrics.count("compaction_tokens_saved", savings["tokens_saved"])
+        metrics.observe_size("transcript_compacted", len(compacted))
+        transcript = compacted
+    if (model_name and model_name != LOCAL_MODEL_NAME and context_enabled()
+            and remote_context_supported(transcript, model_name)):
+        return transcript
+    if EXTRACTIVE_MIN_TOKENS and estimate_tokens(transcript) > EXTRACTIVE_MIN_TOKENS:
+        try:
+            with timed("extractive"):
+                extracted = extract_key_sentences(transcript)
+        except ImportError:
+            return transcript  # NumPy missing: send the full transcript
+        metrics.count("extractive_tokens_saved", estimate_tokens(transcript) - estimate_tokens(extracted))
+        transcript = extracted
+    return transcript
+
+
+def generate_summary(transcript, prompt, model_name=MODEL_NAME):
+    # Returns the summary, or an "Error ..." string (the convention every
+    # front-end already checks for). Summaries are cached under the raw
+    # transcript, so a hit skips compaction and extraction.
+    summary = _generate_summary(transcript, prompt, model_name)
+    if summary.startswith("Error") and _should_fall_back(model_name):
+        return _fallback_summary(transcript, prompt) or summary
+    return summary
+
+
+def cacheable_summary(summary):
+    # For caches keyed by the requested model: offline fallback summaries must
+    # not outlive the Gemini outage that produced them
+    return (isinstance(summary, str) and not summary.startswith("Error")
+            and not summary.startswith(FALLBACK_NOTE))
+
+
+def _fallback_summary(transcript, prompt):
+    # Cached under the local model's name, never under the Gemini one
+    summary = _generate_summary(transcript, prompt, LOCAL_MODEL_NAME)
+    if summary.startswith("Error"):
+        return None
+    return FALLBACK_NOTE + summary
+
+
+def _generate_summary(transcript, prompt, model_name):
+    summary = get_summary_cache().lookup(transcript, prompt, model_name)
+    if summary is not None:
+        return summary
+    return _coalesced_summary(transcript, prompt, model_name)
+
+
+def _coalesced_summary(transcript, prompt, model_name, prepared=None):
+    # Cache miss: identical requests in flight at the same time (in this or
+    # another worker process) share one model call. transcript is the raw text
+    # the cache is keyed on; prepared is its prepare_transcript() output, if known.
+    cache = get_summary_cache()
+    key = summary_key(transcript, prompt, model_name)
+
+    def generate():
+        summary = _generate_summary_uncached(
+            prepared if prepared is not None else prepare_transcript(transcript, model_name),
+            prompt, model_name)
+        if not summary.startswith("Error"):
+            cache.store(transcript, prompt, model_name, summary)
+        return summary
+
+    return get_flights().do("summary:" + key, generate, lookup=lambda: cache.get(key))
+
+
+def _generate_summary_uncached(transcript, prompt, model_name):
+    try:
+        if model_name == LOCAL_MODEL_NAME:
+            return local_summarize(transcript)
+        if context_enabled() and estimate_tokens(prompt + transcript) > CHUNK_TOKENS:
+            return _summarize_with_context(transcript, prompt, model_name)
+        return map_reduce_summarize(transcript, prompt,
+                                    lambda text: generate_text(text, model_name))
+    except Exception as e:
+        return f"Error generating summary: {str(e)}"
+
+
+def _summarize_with_context(transcript, prompt, model_name):
+    # Long transcripts: reuse what earlier prompts for the same transcript left
+    # behind, so only the new instruction has to be sent.
+    contexts = get_context_cache()
+    if remote_context_supported(transcript, model_name):
+        get_model(model_name)  # configures the SDK
+        try:
+            context = contexts.context_for(
+                transcript, model_name, "gemini",
+                lambda: _with_retries(lambda: create_remote_context(transcript, model_name),
+                                      model_name, estimate_tokens(transcript)))
+        except Exception as e:
+            if not _is_transient(e) and not isinstance(e, RateLimited):
+                mark_unsupported(model_name)
+            context = None
+        if context is not None:
+            try:
+                model = remote_model(context["name"])
+                return _with_retries(lambda: _response_text(model.generate_content(prompt)),
+                                     model_name, estimate_tokens(prompt))
+            except RateLimited:
+                raise
+            except Exception:
+                # Expired or deleted on the server: drop the handle and use local notes
+                forget_remote_model(context["name"])
+                contexts.forget(transcript, model_name, "gemini")
+
+    generate = lambda text: generate_text(text, model_name)  # noqa: E731
+    context = contexts.context_for(
+        transcript, model_name, "notes",
+        lambda: {"kind": "notes", "partials": map_stage(transcript, generate)})
+    return reduce_stage(context["partials"], prompt, generate)
+
+
+def generate_summary_stream(transcript, prompt, model_name=MODEL_NAME):
+    # Yields summary text as the model produces it; a cached summary comes out
+    # in one piece. Raises SummaryError on failure.
+    cache = get_summary_cache()
+    summary = cache.lookup(transcript, prompt, model_name)
+    if summary is not None:
+        yield summary
+        return
+    prepared = prepare_transcript(transcript, model_name)
+    if model_name == LOCAL_MODEL_NAME or estimate_tokens(prompt + prepared) > CHUNK_TOKENS:
+        # Map-reduce and the local model have nothing to stream until the end
+        summary = _coalesced_summary(transcript, prompt, model_name, prepared)
+        if summary.startswith("Error") and _should_fall_back(model_name):
+            summary = _fallback_summary(transcript, prompt) or summary
+        if summary.startswith("Error"):
+            raise SummaryError(summary)
+        yield summary
+        return
+    parts = []
+    try:
+        response = _with_retries(
+            lambda: get_model(model_name).generate_content(prompt + prepared, stream=True),
+            model_name, estimate_tokens(prompt + prepared))
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                parts.append(text)
+                yield text
+    except Exception as e:
+        fallback = _fallback_summary(transcript, prompt) if not parts and _should_fall_back(model_name) else None
+        if fallback is None:
+            raise SummaryError(f"Error generating summary: {str(e)}")
+        yield fallback
+        return
+    cache.store(transcript, prompt, model_name, ''.join(parts))
+
+
+def summarize_document(path, kind, prompt, model_name=MODEL_NAME):
+    # Summarize an uploaded PDF/PPTX. Pages are fed into the map stage while
+    # later pages are still being extracted. Returns the summary or an "Error ..." string.
+    cache = get_summary_cache()
+    cache_key = "document:" + file_digest(path)
+    summary = cache.lookup(cache_key, prompt, model_name)
+    if summary is not None:
+        return summary
+    try:
+        pages = (f"[{label}]\n{text}" for label, text in iter_pages(path, kind) if text.strip())
+        summary = map_reduce_stream(pages, prompt, lambda text: generate_text(text, model_name))
+    except Exception as e:
+        return f"Error generating summary: {str(e)}"
+    cache.store(cache_key, prompt, model_name, summary)
+    return summary
@@ -0,0 +1,177 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from core.disk_cache import DEFAULT_DB_PATH
+
+# Outbound rate limiting for Gemini, shared by every worker process through a
+# small SQLite file. Two token buckets are kept per model: one for requests per
+# minute and one for (estimated) input tokens per minute. A caller that finds
+# a bucket empty waits for it to refill instead of failing, up to QUEUE_TIMEOUT.
+# Quota errors from the API put the whole model into a cooldown that grows with
+# each consecutive quota error, so all workers back off together. Like the
+# other shared stores it fails open: a broken limiter database lets calls through.
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", DEFAULT_DB_PATH)
+REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_RPM", 60))  # 0 disables the limiter
+TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TPM", 1000000))  # 0 disables the token budget
+QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 30))  # seconds a request may wait
+COOLDOWN_BASE = float(os.getenv("GEMINI_COOLDOWN_BASE", 2.0))  # seconds
+COOLDOWN_MAX = float(os.getenv("GEMINI_COOLDOWN_MAX", 60.0))
+
+RATE_LIMITED_MESSAGE = "Gemini is busy right now, please try again shortly"
+
+_MAX_SLEEP = 1.0  # re-check the shared state at least this often while waiting
+
+
+class RateLimited(Exception):
+    pass
+
+
+class RateLimiter:
+    def __init__(self, path=RATE_LIMIT_DB_PATH, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE, queue_timeout=QUEUE_TIMEOUT):
+        self.path = path
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.queue_timeout = queue_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " name TEXT PRIMARY KEY,"
+            " requests REAL NOT NULL,"
+            " tokens REAL NOT NULL,"
+            " updated REAL NOT NULL,"
+            " cooldown_until REAL NOT NULL DEFAULT 0,"
+            " strikes INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @property
+    def enabled(self):
+        return self.requests_per_minute > 0
+
+    def _try_acquire(self, name, tokens):
+        # Returns 0 when the request may go ahead, else the seconds to wait
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT requests, tokens, updated, cooldown_until FROM rate_limits WHERE name = ?",
+                (name,)
+            ).fetchone()
+            if row is None:
+                requests, budget, updated, cooldown_until = (
+                    self.requests_per_minute, self.tokens_per_minute, now, 0.0)
+            else:
+                requests, budget, updated, cooldown_until = row
+            # Refill both buckets for the time since the last update
+            elapsed = max(0.0, now - updated)
+            requests = min(self.requests_per_minute, requests + elapsed * self.requests_per_minute / 60)
+            budget = min(self.tokens_per_minute, budget + elapsed * self.tokens_per_minute / 60)
+
+            wait = max(0.0, cooldown_until - now)
+            if requests < 1:
+                wait = max(wait, (1 - requests) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute > 0:
+                # A prompt bigger than the whole budget only has to wait for a full bucket
+                tokens = min(tokens, self.tokens_per_minute)
+                if budget < tokens:
+                    wait = max(wait, (tokens - budget) * 60 / self.tokens_per_minute)
+            if wait == 0:
+                requests -= 1
+                if self.tokens_per_minute > 0:
+                    budget -= tokens
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, requests, tokens, updated, cooldown_until, strikes)"
+                " VALUES (?, ?, ?, ?, ?, COALESCE((SELECT strikes FROM rate_limits WHERE name = ?), 0))",
+                (name, requests, budget, now, cooldown_until, name)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, name, tokens=0):
+        # Blocks until one request of `tokens` estimated input tokens may be sent.
+        # Raises RateLimited if that takes longer than queue_timeout.
+        if not self.enabled:
+            return
+        deadline = time.time() + self.queue_timeout
+        while True:
+            try:
+                wait = self._try_acquire(name, tokens)
+            except sqlite3.Error:
+                return
+            if wait == 0:
+                return
+            if time.time() + wait > deadline:
+                raise RateLimited(RATE_LIMITED_MESSAGE)
+            # Jitter keeps queued workers from waking up and retrying in lockstep
+            time.sleep(min(wait, _MAX_SLEEP) * (0.5 + random.random()))
+
+    def report_quota_error(self, name):
+        # Every worker waits out the cooldown; it doubles with each consecutive quota error
+        if not self.enabled:
+            return
+        try:
+            self._record_quota_error(name)
+        except sqlite3.Error:
+            pass
+
+    def _record_quota_error(self, name):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT strikes FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            strikes = (row[0] if row else 0) + 1
+            cooldown = min(COOLDOWN_MAX, COOLDOWN_BASE * (2 ** (strikes - 1))) * (0.5 + random.random())
+            if row is None:
+                conn.execute(
+                    "INSERT INTO rate_limits (name, requests, tokens, updated, cooldown_until, strikes)"
+                    " VALUES (?, 0, ?, ?, ?, ?)",
+                    (name, self.tokens_per_minute, now, now + cooldown, strikes)
+                )
+            else:
+                conn.execute(
+                    "UPDATE rate_limits SET cooldown_until = MAX(cooldown_until, ?), strikes = ?,"
+                    " requests = 0 WHERE name = ?", (now + cooldown, strikes, name)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def report_success(self, name):
+        if not self.enabled:
+            return
+        try:
+            self._connect().execute(
+                "UPDATE rate_limits SET strikes = 0 WHERE name = ? AND strikes > 0", (name,))
+        except sqlite3.Error:
+            pass
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
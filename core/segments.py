@@ -0,0 +1,45 @@
+from array import array
+
+# Compact transcript representation. The caption texts are joined once into a
+# single string; per-segment start times and durations live in flat arrays
+# instead of one dict per caption line. The transcript cache stores this form.
+
+SEPARATOR = " "
+
+
+class Transcript:
+    __slots__ = ("text", "starts", "durations")
+
+    def __init__(self, text, starts, durations):
+        self.text = text
+        self.starts = starts        # array('d') of segment start times, seconds
+        self.durations = durations  # array('d') of segment durations, seconds
+
+    @classmethod
+    def from_entries(cls, entries):
+        # One pass over the YouTubeTranscriptApi response (list or iterator of
+        # {'text', 'start', 'duration'} dicts).
+        parts = []
+        starts = array("d")
+        durations = array("d")
+        for entry in entries:
+            parts.append(entry["text"])
+            starts.append(float(entry.get("start", 0.0)))
+            durations.append(float(entry.get("duration", 0.0)))
+        return cls(SEPARATOR.join(parts), starts, durations)
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, list):  # cached before the compact form existed
+            return cls.from_entries(data)
+        return cls(data["text"], array("d", data["starts"]), array("d", data["durations"]))
+
+    def to_dict(self):
+        return {"text": self.text, "starts": self.starts.tolist(), "durations": self.durations.tolist()}
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def duration(self):
+        return self.starts[-1] + self.durations[-1] if len(self) else 0.0
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from core.disk_cache import DEFAULT_DB_PATH
+
+# Request coalescing: concurrent calls with the same key share one
+# computation. Within a process, followers wait on the leader's result
+# directly. Across worker processes, the leader holds a lease row in SQLite
+# and the other processes poll the shared cache (the `lookup` callable) until
+# the result shows up. If the lease goes away without a result, they take
+# over. A lease expires after LEASE_TTL in case its holder died.
+FLIGHT_DB_PATH = os.getenv("SINGLEFLIGHT_DB_PATH", DEFAULT_DB_PATH)
+LEASE_TTL = int(os.getenv("SINGLEFLIGHT_LEASE_TTL", 600))  # seconds
+POLL_INTERVAL = float(os.getenv("SINGLEFLIGHT_POLL_INTERVAL", 0.25))  # seconds
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self, path=FLIGHT_DB_PATH, lease_ttl=LEASE_TTL):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.leaders = 0
+        self.coalesced = 0  # calls answered by another thread's or process's computation
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS inflight ("
+            " key TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires REAL NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def do(self, key, compute, lookup=None):
+        # compute() produces the result. lookup() returns a result another
+        # process has already stored (or None); without it coalescing stays
+        # in-process.
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.followers += 1
+                self.coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = self._run(key, compute, lookup)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _run(self, key, compute, lookup):
+        if lookup is None:
+            return compute()
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        try:
+            leased = self._take_lease(key, owner)
+        except sqlite3.Error:
+            return compute()  # A broken lease table should never break summarization
+        while not leased:
+            time.sleep(POLL_INTERVAL)
+            result = self._lookup(lookup)
+            if result is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return result
+            leased = self._take_lease(key, owner)
+        try:
+            # The previous holder may have stored its result just before releasing
+            result = self._lookup(lookup)
+            if result is not None:
+                return result
+            return compute()
+        finally:
+            self._release_lease(key, owner)
+
+    def _lookup(self, lookup):
+        try:
+            return lookup()
+        except sqlite3.Error:
+            return None
+
+    def _take_lease(self, key, owner):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT expires FROM inflight WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute("INSERT OR REPLACE INTO inflight (key, owner, expires) VALUES (?, ?, ?)",
+                         (key, owner, now + self.lease_ttl))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _release_lease(self, key, owner):
+        try:
+            self._connect().execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, owner))
+        except sqlite3.Error:
+            pass  # the lease simply expires
+
+    def stats(self):
+        # Counters are per worker process
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders,
+                    "coalesced": self.coalesced}
+
+
+_flights = None
+_flights_lock = threading.Lock()
+
+
+def get_flights():
+    global _flights
+    with _flights_lock:
+        if _flights is None:
+            _flights = SingleFlight()
+        return _flights
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+from core.disk_cache import DEFAULT_DB_PATH, DiskCache
+
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", DEFAULT_DB_PATH)
+CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", 30 * 24 * 3600))  # seconds, 0 = never expire
+CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 5000))
+CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+
+def summary_key(transcript, prompt, model_name):
+    # Hash each part separately so "ab" + "c" and "a" + "bc" never collide
+    parts = [
+        hashlib.sha256(transcript.encode("utf-8")).hexdigest(),
+        hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        model_name,
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class SummaryCache(DiskCache):
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL,
+                 max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        super().__init__(path, "summaries", ttl, max_bytes=max_bytes, max_entries=max_entries)
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def lookup(self, transcript, prompt, model_name):
+        try:
+            summary = self.get(summary_key(transcript, prompt, model_name))
+        except sqlite3.Error:
+            summary = None
+            with self._stats_lock:
+                self.errors += 1
+        with self._stats_lock:
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return summary
+
+    def store(self, transcript, prompt, model_name, summary):
+        try:
+            self.put(summary_key(transcript, prompt, model_name), summary)
+        except sqlite3.Error:
+            with self._stats_lock:
+                self.errors += 1
+
+    def stats(self):
+        # Counters are per worker process
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache()
+        return _cache
@@ -0,0 +1,104 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+from core.images import fetch_image
+from core.media import valid_video_id
+
+# Local copy of each video thumbnail, fetched from YouTube once, plus resized
+# JPEG/WebP variants generated on first use. Files are written atomically so
+# every worker process can share the directory.
+THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", os.path.join(tempfile.gettempdir(), "thumbnails"))
+THUMBNAIL_WIDTHS = (120, 320, 480)  # 0 means the original size
+THUMBNAIL_FORMATS = {"jpeg": ("image/jpeg", "jpg"), "webp": ("image/webp", "webp")}
+
+_SOURCES = ("hqdefault.jpg", "0.jpg")
+
+_etags = {}
+_etags_lock = threading.Lock()
+
+
+def snap_width(width):
+    # Only a few sizes are generated, so arbitrary ?w= values cannot fill the disk
+    if not width or width <= 0:
+        return 0
+    for size in THUMBNAIL_WIDTHS:
+        if width <= size:
+            return size
+    return 0
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _original_path(video_id):
+    path = os.path.join(THUMBNAIL_DIR, f"{video_id}.jpg")
+    if os.path.exists(path):
+        return path
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    for source in _SOURCES:
+        image = fetch_image(f"https://img.youtube.com/vi/{video_id}/{source}")
+        if image is not None:
+            _write_atomic(path, image[0])
+            return path
+    return None
+
+
+def _variant_path(video_id, original, width, fmt):
+    if width == 0 and fmt == "jpeg":
+        return original
+    path = os.path.join(THUMBNAIL_DIR, f"{video_id}_{width or 'full'}.{THUMBNAIL_FORMATS[fmt][1]}")
+    if os.path.exists(path):
+        return path
+    try:
+        from PIL import Image
+        image = Image.open(original).convert("RGB")
+        if width and image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format="WEBP" if fmt == "webp" else "JPEG", quality=82)
+        _write_atomic(path, out.getvalue())
+        return path
+    except Exception:
+        return None  # Pillow missing or unreadable image
+
+
+def _etag_for(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _etags_lock:
+        etag = _etags.get(key)
+    if etag is None:
+        with open(path, "rb") as f:
+            etag = hashlib.sha256(f.read()).hexdigest()[:32]
+        with _etags_lock:
+            if len(_etags) > 4096:
+                _etags.clear()
+            _etags[key] = etag
+    return etag
+
+
+def get_thumbnail(video_id, width=0, fmt="jpeg"):
+    # Returns (path, mimetype, etag), or None if YouTube has no thumbnail.
+    # Falls back to the original JPEG when a variant cannot be generated.
+    if not valid_video_id(video_id):
+        return None  # the ID becomes part of a file name
+    original = _original_path(video_id)
+    if original is None:
+        return None
+    width = snap_width(width)
+    fmt = fmt if fmt in THUMBNAIL_FORMATS else "jpeg"
+    path = _variant_path(video_id, original, width, fmt)
+    if path is None:
+        path, fmt = original, "jpeg"
+    return path, THUMBNAIL_FORMATS[fmt][0], _etag_for(path)
+
+
+def thumbnail_url(video_id, width=480):
+    return f"/thumbnail/{video_id}?w={width}"
@@ -0,0 +1,91 @@
+import os
+import re
+import sqlite3
+import threading
+
+from core.disk_cache import DEFAULT_DB_PATH, DiskCache
+from core.segments import Transcript
+from core.singleflight import get_flights
+
+# Where the cache lives and how big it may grow. One SQLite file is shared by
+# every gunicorn worker / Streamlit process on the machine.
+CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", DEFAULT_DB_PATH)
+CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", 7 * 24 * 3600))  # seconds
+CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_VIDEO_ID_PATTERNS = (
+    re.compile(r"[?&]v=([A-Za-z0-9_-]{11})"),
+    re.compile(r"youtu\.be/([A-Za-z0-9_-]{11})"),
+    re.compile(r"/(?:embed|shorts|live|v)/([A-Za-z0-9_-]{11})"),
+)
+
+
+def normalize_video_id(link_or_id):
+    # Accepts a bare ID or any of the usual YouTube URL shapes.
+    value = (link_or_id or "").strip()
+    if _VIDEO_ID_RE.match(value):
+        return value
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(value)
+        if match:
+            return match.group(1)
+    # Fall back to the split the front-ends have always used
+    return value.split("v=")[-1].split("&")[0]
+
+
+def _cache_key(video_id, languages):
+    return normalize_video_id(video_id) + "|" + ",".join(languages)
+
+
+class TranscriptCache(DiskCache):
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        super().__init__(path, "transcripts", ttl, max_bytes=max_bytes)
+
+    def get(self, video_id, languages=("en",)):
+        data = super().get(_cache_key(video_id, languages))
+        return None if data is None else Transcript.from_dict(data)
+
+    def put(self, video_id, transcript, languages=("en",)):
+        super().put(_cache_key(video_id, languages), transcript.to_dict())
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptCache()
+        return _cache
+
+
+def fetch_transcript(video_id, languages=("en",)):
+    # Returns a core.segments.Transcript, going to YouTube only when no fresh
+    # copy is cached.
+    languages = tuple(languages)
+    video_id = normalize_video_id(video_id)
+    cache = get_cache()
+    try:
+        transcript = cache.get(video_id, languages)
+    except sqlite3.Error:
+        transcript = None
+    if transcript is not None:
+        return transcript
+
+    def download():
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        transcript = Transcript.from_entries(
+            YouTubeTranscriptApi.get_transcript(video_id, languages=list(languages)))
+        try:
+            cache.put(video_id, transcript, languages)
+        except sqlite3.Error:
+            pass  # A broken cache should never break summarization
+        return transcript
+
+    # Many requests for the same video at once make a single trip to YouTube
+    return get_flights().do("transcript:" + _cache_key(video_id, languages), download,
+                            lookup=lambda: cache.get(video_id, languages))
@@ -1,33 +1,26 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi
-import shutil
-from pathlib import Path
-import requests
-import time
+from core import pipeline
+from core.memo import memoize, memo_stats
+from core.thumbnails import get_thumbnail
+from core.image_store import get_store as get_image_store
+from core.images import fetch_images
+from core.diagram_queries import extract_diagram_queries, merge_results, search_concurrently
+import uuid
 from duckduckgo_search import DDGS  # Using DDGS as per your original code
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Configure Gemini once per process and reuse the model across reruns
+pipeline.warm_up()
 
-# Directory to store images
-temp_dir = Path("temp_images")
-
-# Remove old images safely
-try:
-    shutil.rmtree(temp_dir)  # Delete folder and its contents
-except FileNotFoundError:
-    pass  # Folder doesn't exist, nothing to remove
-except Exception as e:
-    print(f"Warning: Could not delete temp_images - {e}")
-
-# Recreate directory
-temp_dir.mkdir(exist_ok=True)
+# Images are kept in a shared content-addressed store, so reruns and other
+# sessions reuse earlier downloads instead of wiping them
+image_store = get_image_store()
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # --- SESSION STATE INITIALIZATION ---
 if "summary" not in st.session_state:
@@ -55,52 +48,66 @@ Your task is to summarize the video transcript following the proper answer-writi
 
 # --- FUNCTION TO EXTRACT YOUTUBE TRANSCRIPT ---
 def extract_transcript(youtube_video_url):
-    try:
-        video_id = youtube_video_url.split("v=")[-1].split("&")[0]  # Extract Video ID
-        transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'hi'])
-        transcript = " ".join([entry["text"] for entry in transcript_data])
-        return transcript
-    except Exception as e:
-        return f"Error retrieving transcript: {str(e)}"
+    video_id = youtube_video_url.split("v=")[-1].split("&")[0]  # Extract Video ID
+    return transcript_for_video(video_id)
+
+
+# Memoized stages: only the stage whose inputs changed runs again on a rerun
+@memoize("transcript", ttl=6 * 3600, max_entries=64)
+def transcript_for_video(video_id):
+    return pipeline.extract_transcript(video_id, languages=('en', 'hi'))
+
+
+@memoize("summary", ttl=6 * 3600, max_entries=64, cache_if=pipeline.cacheable_summary)
+def summary_for(transcript_text, prompt, model_name):
+    return pipeline.generate_summary(transcript_text, prompt, model_name)
+
+
+@memoize("thumbnail", ttl=24 * 3600, max_entries=256)
+def thumbnail_for(video_id):
+    thumbnail = get_thumbnail(video_id)
+    return thumbnail[0] if thumbnail else None
 
 
 # --- FUNCTION TO GENERATE SUMMARY USING GEMINI ---
 def generate_gemini_summary(transcript_text, custom_prompt=""):
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt_to_use = (custom_prompt + transcript_text) if custom_prompt else (PROMPT + transcript_text)
-        response = model.generate_content(prompt_to_use)
-        return response.text if hasattr(response, "text") else "Error: Unexpected response format from API."
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+    # Use custom prompt if provided, otherwise use the default prompt
+    return summary_for(transcript_text, custom_prompt or PROMPT, pipeline.MODEL_NAME)
+
+
+# Images kept per diagram query; several queries fill the first screen together
+IMAGES_PER_QUERY = 2
 
 
-# --- FUNCTION TO DOWNLOAD 5 IMAGES USING DUCKDUCKGO ---
-def download_relevant_images(search_query):
+# --- FUNCTION TO DOWNLOAD IMAGES USING DUCKDUCKGO ---
+# Runs on search worker threads, so the session id is passed in rather than
+# read from st.session_state. The search itself is memoized per query and
+# shared by every session; each call pins the result for the caller's session,
+# and searches again if the image store has evicted it since.
+def download_relevant_images(search_query, session_id):
+    for _ in range(2):
+        images = search_images(search_query)
+        if not isinstance(images, list) or image_store.pin(images, session_id):
+            return images
+        search_images.forget(search_query)
+    return None
+
+@memoize("image_search", ttl=6 * 3600, max_entries=128)
+def search_images(search_query):
     try:
+        cached = image_store.lookup_query(search_query)
+        if cached:
+            return cached
+
         with DDGS() as ddgs:
-            image_results = ddgs.images(search_query, max_results=5)
+            image_results = ddgs.images(search_query, max_results=10)
         if not image_results:
             return None
 
-        downloaded_images = []
-        for index, result in enumerate(image_results[:5]):
-            image_url = result["image"]
-            print(f"Downloading image {index}: {image_url}")  # Debug print
-            response = requests.get(image_url, stream=True, timeout=10)
-            if response.status_code == 200:
-                image_path = temp_dir / f"image_{index}.jpg"
-                with open(image_path, "wb") as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                # Brief delay to ensure the file is flushed
-                time.sleep(0.2)
-                abs_path = str(image_path.resolve())
-                if os.path.exists(abs_path):
-                    print(f"Saved image {index} at: {abs_path}")  # Debug print
-                    downloaded_images.append(abs_path)
-                else:
-                    print(f"Failed to save image {index} at: {abs_path}")
+        # Fetch candidates concurrently and keep the first usable images
+        candidates = [result["image"] for result in image_results]
+        images = [(data, extension) for _, data, extension in fetch_images(candidates, wanted=IMAGES_PER_QUERY)]
+        downloaded_images = image_store.store_query(search_query, images)
         return downloaded_images if downloaded_images else None
     except Exception as e:
         return f"Error downloading images: {str(e)}"
@@ -110,13 +117,16 @@ def download_relevant_images(search_query):
 
 st.title("📜 YouTube Video Summarizer (Engineering Notes)")
 
+with st.sidebar.expander("⚙️ Cache statistics"):
+    st.json(memo_stats())
+
 # Input YouTube URL
 youtube_link = st.text_input("🎥 Enter YouTube Video Link:")
 
 # Display video thumbnail if URL is entered
 if youtube_link:
     video_id = youtube_link.split("v=")[-1].split("&")[0]
-    st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
+    st.image(thumbnail_for(video_id) or f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
 
 # Option to choose default or custom prompt
 prompt_option = st.radio("Choose a prompt option:",
@@ -138,18 +148,15 @@ if st.button("📝 Get Summary"):
         st.markdown("## 📝 Detailed Notes:")
         st.write(st.session_state.summary)
 
-        # Determine diagram query:
-        # Use a fixed query if summary mentions "8086", otherwise use first few words.
-        if "8086" in st.session_state.summary:
-            diagram_query = "8086 microprocessor architecture block diagram"
-        else:
-            keywords = st.session_state.summary.split()[:5]
-            diagram_query = " ".join(keywords) + " diagram"
-
-        st.write(f"Using diagram query: **{diagram_query}**")  # Debug: show the query
+        # One image search per diagram the notes mention, run concurrently
+        diagram_queries = extract_diagram_queries(st.session_state.summary)
+        st.write("Using diagram queries: " + ", ".join(f"**{query}**" for query in diagram_queries))
 
         with st.spinner("Downloading relevant diagrams..."):
-            st.session_state.image_paths = download_relevant_images(diagram_query)
+            session_id = st.session_state.session_id
+            results = search_concurrently(diagram_queries,
+                                          lambda query: download_relevant_images(query, session_id))
+            st.session_state.image_paths = merge_results(results)
             st.session_state.image_index = 0  # Reset index
     else:
         st.error(transcript_text)
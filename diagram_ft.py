@@ -5,37 +5,30 @@ streamlit run B:/NHITM/SEM-IV/Mini/Hive/diagram_ft.py
 import streamlit as st
 from dotenv import load_dotenv
 import os
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi
-import requests
-import shutil
-from pathlib import Path
+from core import pipeline
+from core.thumbnails import get_thumbnail
+from core.image_store import get_store as get_image_store
+from core.images import IMAGE_TIMEOUT, fetch_images, get_session
+from core.diagram_queries import extract_diagram_queries, search_concurrently
+import uuid
 from bs4 import BeautifulSoup  # For extracting image URLs
 import random
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Configure Gemini once per process and reuse the model across reruns
+pipeline.warm_up()
 
 # Bing Search API (Replace 'YOUR_BING_KEY' with actual key)
 BING_SEARCH_API_KEY = os.getenv("BING_API_KEY")
 BING_SEARCH_URL = "https://www.bing.com/images/search"
 
-# Directory to store images
-temp_dir = Path("temp_images")
-
-# Remove old images safely
-try:
-    shutil.rmtree(temp_dir)  # Deletes folder and contents
-except FileNotFoundError:
-    pass  # Folder doesn't exist, nothing to remove
-except Exception as e:
-    print(f"Warning: Could not delete temp_images - {e}")
-
-# Recreate directory
-temp_dir.mkdir(exist_ok=True)
+# Images are kept in a shared content-addressed store, so reruns and other
+# sessions reuse earlier downloads instead of wiping them
+image_store = get_image_store()
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 
 # --- PROMPT FOR SUMMARIZATION ---
@@ -61,55 +54,39 @@ Your task is to summarize the video transcript following the proper answer-writi
 
 # --- FUNCTION TO EXTRACT YOUTUBE TRANSCRIPT ---
 def extract_transcript(youtube_video_url):
-    try:
-        video_id = youtube_video_url.split("v=")[-1].split("&")[0]  # Extract Video ID
-        transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'hi'])
-        transcript = " ".join([entry["text"] for entry in transcript_data])
-        return transcript
-    except Exception as e:
-        return f"Error retrieving transcript: {str(e)}"
+    video_id = youtube_video_url.split("v=")[-1].split("&")[0]  # Extract Video ID
+    return pipeline.extract_transcript(video_id, languages=('en', 'hi'))
 
 
 # --- FUNCTION TO GENERATE SUMMARY USING GEMINI ---
 def generate_gemini_summary(transcript_text):
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(PROMPT + transcript_text)
-
-        if hasattr(response, "text"):
-            return response.text
-        else:
-            return "Error: Unexpected response format from API."
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+    return pipeline.generate_summary(transcript_text, PROMPT)
 
 
 # --- FUNCTION TO SEARCH AND DOWNLOAD IMAGE FROM BING ---
-def fetch_image(search_query):
+# Runs on search worker threads, so the session id is passed in rather than
+# read from st.session_state
+def fetch_image(search_query, session_id):
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
+        cached = image_store.lookup_query(search_query, session_id)
+        if cached:
+            return cached[0]
+
         params = {"q": search_query, "form": "HDRSC2"}
 
-        response = requests.get(BING_SEARCH_URL, headers=headers, params=params)
+        response = get_session().get(BING_SEARCH_URL, params=params, timeout=IMAGE_TIMEOUT)
         soup = BeautifulSoup(response.text, "html.parser")
 
         # Extract image URLs
         image_elements = soup.find_all("img")
         image_urls = [img["src"] for img in image_elements if img.get("src") and img["src"].startswith("http")]
 
-        if image_urls:
-            # Select a random image from the first 5 results
-            image_url = random.choice(image_urls[:5])
-
-            # Download the image
-            image_response = requests.get(image_url, stream=True)
-            image_path = temp_dir / "diagram.jpg"
-
-            with open(image_path, "wb") as f:
-                for chunk in image_response.iter_content(1024):
-                    f.write(chunk)
-
-            return str(image_path)
+        # Try a random order of the first 5 results concurrently and keep the first usable image
+        candidates = random.sample(image_urls[:5], len(image_urls[:5]))
+        images = fetch_images(candidates, wanted=1)
+        if images:
+            image_url, data, extension = images[0]
+            return image_store.store_query(search_query, [(data, extension)], session_id)[0]
         else:
             return None
 
@@ -126,7 +103,8 @@ youtube_link = st.text_input("🎥 Enter YouTube Video Link:")
 # Display video thumbnail if URL is entered
 if youtube_link:
     video_id = youtube_link.split("v=")[-1].split("&")[0]
-    st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
+    thumbnail = get_thumbnail(video_id)  # served from the local thumbnail cache
+    st.image(thumbnail[0] if thumbnail else f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
 
 # Generate summary when button is clicked
 if st.button("📝 Get Detailed Notes"):
@@ -140,16 +118,18 @@ if st.button("📝 Get Detailed Notes"):
         st.markdown("## 📝 Detailed Notes:")
         st.write(summary)
 
-        # Extract possible diagram keyword
-        keywords = summary.split()[:5]  # Use first few words to find a diagram
-        diagram_query = " ".join(keywords) + " diagram"
+        # One image search per diagram the notes mention, run concurrently
+        diagram_queries = extract_diagram_queries(summary)
 
         with st.spinner("Searching for relevant diagrams..."):
-            image_path = fetch_image(diagram_query)
-
-        if image_path and not image_path.startswith("Error"):
-            st.image(image_path, caption="Relevant Diagram", use_container_width=True, width=700)
-        else:
+            session_id = st.session_state.session_id
+            results = search_concurrently(diagram_queries, lambda query: fetch_image(query, session_id))
+        found = [(query, image_path) for query, image_path in results
+                 if image_path and not image_path.startswith("Error")]
+
+        for query, image_path in found:
+            st.image(image_path, caption=query, use_container_width=True, width=700)
+        if not found:
             st.error("No relevant diagram image found. Please 'Draw a ____ Type of Diagram' as indicated in the summary.")
 
     else:
@@ -0,0 +1,8 @@
+# Picked up automatically by gunicorn when started from the project root.
+
+
+def post_worker_init(worker):
+    # Build the shared Gemini client in each worker before it takes traffic,
+    # so the first summary request does not pay for SDK import and setup.
+    from core import pipeline
+    pipeline.warm_up()
@@ -3,11 +3,13 @@ from dotenv import load_dotenv
 
 load_dotenv()  ##load all the evironment variables
 import os
-import google.generativeai as genai
 
 from youtube_transcript_api import YouTubeTranscriptApi
+from core.segments import Transcript
+from core import pipeline
+from core.thumbnails import get_thumbnail
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+pipeline.warm_up("gemini-pro")
 
 prompt = """
 You are Youtube video summarizer. You will be taking the transcript text and summarizing the entire video and
@@ -23,9 +25,7 @@ def extract_transcript_details(youtube_video_url):
 
         transcript_text = YouTubeTranscriptApi.get_transcript(video_id)
 
-        transcript = ""
-        for i in transcript_text:
-            transcript += " " + i["text"]
+        transcript = Transcript.from_entries(transcript_text).text
 
         return transcript
 
@@ -35,9 +35,7 @@ def extract_transcript_details(youtube_video_url):
 
 ## getting the summary based on Prompt from Google Gemini Pro
 def generate_gemini_content(transcript_text, prompt):
-    model = genai.GenerativeModel("gemini-pro")
-    response = model.generate_content(prompt + transcript_text)
-    return response.text
+    return pipeline.generate_text(prompt + transcript_text, model_name="gemini-pro")
 
 
 st.title("YouTube Transcript to Detailed Notes Converter")
@@ -46,7 +44,8 @@ youtube_link = st.text_input("Enter YouTube Video Link:")
 if youtube_link:
     video_id = youtube_link.split("=")[1]
     print(video_id)
-    st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_column_width=True)
+    thumbnail = get_thumbnail(video_id)  # served from the local thumbnail cache
+    st.image(thumbnail[0] if thumbnail else f"http://img.youtube.com/vi/{video_id}/0.jpg", use_column_width=True)
 
 if st.button("Get Detailed Notes"):
     transcript_text = extract_transcript_details(youtube_link)
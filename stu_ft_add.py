@@ -1,15 +1,15 @@
 #streamlit run B:/NHITM/SEM-IV/Mini/Hive/stu_ft_add.py
 import streamlit as st
 from dotenv import load_dotenv
-import os
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi
+from core import pipeline
+from core.memo import memoize, memo_stats
+from core.thumbnails import get_thumbnail
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Configure Gemini once per process and reuse the model across reruns
+pipeline.warm_up()
 
 # Improved prompt with structured format
 PROMPT = """
@@ -35,40 +35,40 @@ Your task is to summarize the video transcript following the proper answer-writi
 
 # Function to extract transcript from YouTube video
 def extract_transcript(youtube_video_url):
-    try:
-        video_id = youtube_video_url.split("v=")[-1]  # Extract video ID
-        transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'hi'])
+    video_id = youtube_video_url.split("v=")[-1]  # Extract video ID
+    return transcript_for_video(video_id)
 
-        transcript = " ".join([entry["text"] for entry in transcript_data])
-        return transcript
+# Memoized stages: only the stage whose inputs changed runs again on a rerun
+@memoize("transcript", ttl=6 * 3600, max_entries=64)
+def transcript_for_video(video_id):
+    return pipeline.extract_transcript(video_id, languages=('en', 'hi'))
 
-    except Exception as e:
-        return f"Error retrieving transcript: {str(e)}"
+@memoize("summary", ttl=6 * 3600, max_entries=64, cache_if=pipeline.cacheable_summary)
+def summary_for(transcript_text, prompt, model_name):
+    return pipeline.generate_summary(transcript_text, prompt, model_name)
+
+@memoize("thumbnail", ttl=24 * 3600, max_entries=256)
+def thumbnail_for(video_id):
+    thumbnail = get_thumbnail(video_id)
+    return thumbnail[0] if thumbnail else None
 
 # Function to generate summary using Google Gemini API
 def generate_gemini_summary(transcript_text):
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(PROMPT + transcript_text)
-
-        if hasattr(response, "text"):
-            return response.text
-        else:
-            return "Error: Unexpected response format from API."
-
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+    return summary_for(transcript_text, PROMPT, pipeline.MODEL_NAME)
 
 # Streamlit UI
 st.title("📜 YouTube Video Summarizer (Engineering Notes)")
 
+with st.sidebar.expander("⚙️ Cache statistics"):
+    st.json(memo_stats())
+
 # Input YouTube URL
 youtube_link = st.text_input("🎥 Enter YouTube Video Link:")
 
 # Display video thumbnail if URL is entered
 if youtube_link:
     video_id = youtube_link.split("v=")[-1]
-    st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
+    st.image(thumbnail_for(video_id) or f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
 
 # Generate summary when button is clicked
 if st.button("📝 Get Detailed Notes"):
@@ -4,14 +4,16 @@ import requests
 from pytube import YouTube
 import streamlit as st
 from dotenv import load_dotenv
-import google.generativeai as genai
 from youtube_transcript_api import YouTubeTranscriptApi
+from core.segments import Transcript
+from core import pipeline
+from core.thumbnails import get_thumbnail
 
 # Load environment variables
 load_dotenv()
 
 # Google Gemini API setup
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+pipeline.warm_up("gemini-pro")
 
 prompt = """
 You are YouTube video summarizer. You will be taking the transcript text and summarizing the entire video and
@@ -64,9 +66,7 @@ def extract_transcript_details(youtube_video_url):
         video_id = youtube_video_url.split("=")[1]
         transcript_text = YouTubeTranscriptApi.get_transcript(video_id)
 
-        transcript = ""
-        for i in transcript_text:
-            transcript += " " + i["text"]
+        transcript = Transcript.from_entries(transcript_text).text
 
         return transcript
 
@@ -76,9 +76,7 @@ def extract_transcript_details(youtube_video_url):
 
 # Generate summary from Google Gemini
 def generate_gemini_content(transcript_text, prompt):
-    model = genai.GenerativeModel("gemini-pro")
-    response = model.generate_content(prompt + transcript_text)
-    return response.text
+    return pipeline.generate_text(prompt + transcript_text, model_name="gemini-pro")
 
 # Streamlit interface
 st.title("YouTube Video Downloader and Summarizer")
@@ -88,7 +86,8 @@ youtube_link = st.text_input("Enter YouTube Video Link:")
 
 if youtube_link:
     video_id = youtube_link.split("=")[1]
-    st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
+    thumbnail = get_thumbnail(video_id)  # served from the local thumbnail cache
+    st.image(thumbnail[0] if thumbnail else f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
 
     # Video download options
     st.subheader("Download Options")